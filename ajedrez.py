@@ -1,105 +1,141 @@
 import tkinter as tk
 from tkinter import messagebox
-from PIL import Image, ImageTk
 import chess
-import os
+import argparse
+import logging
+import queue
+import threading
+import time
+from motor import AI_TIME_BUDGET_MS, PIECE_VALUES, SearchEngine, Determine_winner, is_all_pieces_captured, logger, piece_name, setup_custom_board
+from sprites import SpriteAtlas
 
 # Tamaño de cada celda del tablero
 CELL_SIZE = 80
 # Colores para resaltar las casillas seleccionadas y las posibles jugadas
 HIGHLIGHT_COLOR_SELECTED = "yellow"
 HIGHLIGHT_COLOR_MOVE = "blue"
-# Clase para representar una versión personalizada del rey
-class CustomKing(chess.Piece):
-    def __init__(self, color):
-        super().__init__(chess.KING, color)
+# Procesos que usa la IA para repartir las jugadas de la raíz (1 = búsqueda en serie)
+AI_WORKERS = 1
+# Cada cuántos milisegundos la interfaz revisa la cola de mensajes de la búsqueda de la IA
+AI_POLL_MS = 50
+# Si es True, la IA sigue buscando durante el turno del jugador sobre la respuesta que espera de él
+AI_PONDER = True
+# Si es True, cada búsqueda de la IA escribe en el registro una línea JSON con sus estadísticas
+AI_LOG_STATS = False
 # Clase principal del tablero de ajedrez
 class LoseChessBoard:
     def __init__(self, root, canvas, player_color):
         self.root = root
         self.canvas = canvas
         self.board = self.setup_custom_board()
-        self.piece_images = self.load_piece_images()
+        self.engine = SearchEngine(workers=AI_WORKERS)  # Motor de búsqueda de la IA
+        self.engine.log_stats = AI_LOG_STATS
+        self.show_stats = False  # Muestra sobre el tablero las estadísticas de la última búsqueda (tecla e)
+        self.last_move_stats = None  # Estadísticas de la búsqueda de la última jugada que hizo la IA
+        self.ai_queue = queue.Queue()  # Mensajes del hilo de la IA hacia la interfaz
+        self.ai_thread, self.ai_cancelled = None, False
+        self.poll_id, self.ponder_timer = None, None  # Llamadas programadas con after para revisar la cola y cortar el ponder
+        self.ponder_move, self.ponder_start, self.ponder_result = None, 0.0, None  # Jugada esperada del jugador y estado del ponder
+        self.ponder_result_stats = None  # Estadísticas de la búsqueda del ponder ya terminada
+        self.ponder_stats = {"hits": 0, "misses": 0, "time_saved": 0.0}  # Aciertos, fallos y segundos ahorrados con el ponder
+        self.window_title = self.root.title()
+        self.piece_images = SpriteAtlas(CELL_SIZE)  # Imágenes de las piezas; cada una se carga la primera vez que se dibuja
         self.player_color = player_color
         self.ai_color = chess.BLACK if player_color == chess.WHITE else chess.WHITE
         self.current_turn = chess.WHITE  # Inicializa el turno en blanco
         self.selected_square = None # Cuadro seleccionado inicialmente es None
         self.move_counter, self.turn_counter = {}, {}  # Diccionarios vacíos para contadores de movimientos y turnos
+        self.piece_items, self.drawn_pieces, self.free_piece_items = {}, {}, []  # Imagen dibujada en cada casilla y elementos libres para reutilizar
+        self.create_board_items()  # Crea una sola vez las casillas y la capa de resaltado
         self.draw_chessboard()  # Dibuja el tablero de ajedrez
         self.canvas.bind("<Button-1>", self.on_click) # Vincula el clic izquierdo del mouse al método on_click
+        self.root.bind("<space>", lambda event: self.force_ai_move())  # La barra espaciadora obliga a la IA a jugar ya
+        self.root.bind("<e>", lambda event: self.toggle_stats())  # La tecla e muestra u oculta las estadísticas de la búsqueda
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)  # Cancela la búsqueda al cerrar la ventana
     # Configura el tablero con una disposición inicial personalizada
     def setup_custom_board(self):
-        board = chess.Board(fen=None)
-        # Define las piezas personalizadas y las piezas estándar para el tablero inicial y Usar CustomKing en lugar de chess.KING
-        pieces = [chess.ROOK, chess.KNIGHT, chess.BISHOP, chess.QUEEN, CustomKing, chess.BISHOP, chess.KNIGHT, chess.ROOK]
-         # Coloca las piezas en sus posiciones iniciales
-
-        for i, piece in enumerate(pieces):
-            if piece == CustomKing:
-              # Coloca el rey personalizado en las posiciones iniciales de blancas y negras
-                board.set_piece_at(chess.square(i, 0), CustomKing(chess.WHITE))
-                board.set_piece_at(chess.square(i, 7), CustomKing(chess.BLACK))
-            else:
-             # Coloca las piezas estándar  en las posiciones iniciales
-
-                board.set_piece_at(chess.square(i, 0), chess.Piece(piece, chess.WHITE))
-                board.set_piece_at(chess.square(i, 7), chess.Piece(piece, chess.BLACK))
-            # Coloca los peones en las filas de peones
-
-        for i in range(8):
-            board.set_piece_at(chess.square(i, 1), chess.Piece(chess.PAWN, chess.WHITE))
-            board.set_piece_at(chess.square(i, 6), chess.Piece(chess.PAWN, chess.BLACK))
-        return board
-     # Carga las imágenes de las piezas
-    def load_piece_images(self):
-        piece_images = {} # Diccionario para almacenar las imágenes de las piezas
-        piezas = ["reina_blanco", "torre_blanco", "alfil_blanco", "caballo_blanco", "peon_blanco", "rey_blanco",
-                  "reina_negro", "torre_negro", "alfil_negro", "caballo_negro", "peon_negro", "rey_negro"]
-        for pieza in piezas:
-                    # Genera el nombre del archivo de imagen a partir del nombre de la pieza
-
-            filename = os.path.join("imágenes", f"{pieza}.png")
-            try:
-             # Intenta cargar la imagen y redimensionarla a un tamaño específico
-                image = ImageTk.PhotoImage(Image.open(filename).resize((CELL_SIZE, CELL_SIZE)))
-             # Almacena la imagen cargada en el diccionario de imágenes de piezas
- 
-                piece_images[pieza] = image
-            except FileNotFoundError:
-               # Captura el error si el archivo no se encuentra
-
-                print(f"¡Error! No se encontró el archivo {filename}.")
-            except Exception as e:
-                print(f"¡Error al cargar {filename}: {str(e)}")
-
-        return piece_images  #Devuelve el diccionario completo de imágenes de piezas
-    # Dibuja el tablero de ajedrez y las piezas
-    def draw_chessboard(self):
-        self.canvas.delete("all")
-        
-        #dibuja el tablero de ajedrez utilizando un bucle que recorre cada casilla del tablero. La casilla se colorea según sea par o impar 
+        return setup_custom_board()
+    # Crea los elementos persistentes del lienzo: las 64 casillas, los marcos de resaltado y el panel de estadísticas.
+    # Después solo se modifican con itemconfig/coords, sin borrar y volver a crear el tablero
+    def create_board_items(self):
+        #dibuja el tablero de ajedrez utilizando un bucle que recorre cada casilla del tablero. La casilla se colorea según sea par o impar
         for i in range(8):
             for j in range(8):
                 color = "#8AE5DA" if (i + j) % 2 == 0 else "#FDFEFE"
-                self.canvas.create_rectangle(j * CELL_SIZE, i * CELL_SIZE, (j + 1) * CELL_SIZE, (i + 1) * CELL_SIZE, fill=color)
-        #Después, recorre cada casilla del tablero y, si hay una pieza en esa casilla, la dibuja en la posición correspondiente. 
-        for square in chess.SQUARES:
-            piece = self.board.piece_at(square)
-            if piece:
-                row, col = divmod(square, 8)
-                piece_name = self.get_piece_name(piece)
-                image = self.piece_images.get(piece_name)
-                if image:
-                    self.canvas.create_image(col * CELL_SIZE, (7 - row) * CELL_SIZE, anchor=tk.NW, image=image)
+                self.canvas.create_rectangle(j * CELL_SIZE, i * CELL_SIZE, (j + 1) * CELL_SIZE, (i + 1) * CELL_SIZE, fill=color, tags="square")
+        self.selected_item = self.canvas.create_rectangle(0, 0, 0, 0, outline=HIGHLIGHT_COLOR_SELECTED, width=3, state=tk.HIDDEN, tags="highlight")
+        self.move_items, self.visible_move_items = [], 0  # Marcos de resaltado de jugadas; se reutilizan y los que sobran se ocultan
+        self.selected_visible, self.overlay_visible = False, False
+        self.stats_box = self.canvas.create_rectangle(0, 0, 0, 0, fill="white", outline="gray", state=tk.HIDDEN, tags="overlay")
+        self.stats_text = self.canvas.create_text(6, 6, anchor=tk.NW, fill="black", font=("TkFixedFont", 9), state=tk.HIDDEN, tags="overlay")
+    # Coordenadas del rectángulo de una casilla en el lienzo
+    def square_coords(self, square):
+        col, row = chess.square_file(square), chess.square_rank(square)
+        return col * CELL_SIZE, (7 - row) * CELL_SIZE, (col + 1) * CELL_SIZE, (8 - row) * CELL_SIZE
+    # Actualiza el tablero dibujado: solo cambian las casillas cuya pieza es distinta de la ya dibujada
+    def draw_chessboard(self):
+        pieces = {square: self.get_piece_name(piece) for square, piece in self.board.piece_map().items()}
+        created = False
+        #Quita las piezas de las casillas que se han vaciado o cambiado; sus imágenes quedan libres para reutilizarse
+        for square in [square for square, name in self.drawn_pieces.items() if pieces.get(square) != name]:
+            del self.drawn_pieces[square]
+            item = self.piece_items.pop(square, None)
+            if item is not None:
+                self.canvas.itemconfig(item, state=tk.HIDDEN)
+                self.free_piece_items.append(item)
+        #Coloca las piezas nuevas moviendo una imagen libre a su casilla o, si no hay, creando una
+        for square, name in pieces.items():
+            if square in self.drawn_pieces:
+                continue
+            self.drawn_pieces[square] = name
+            image = self.piece_images.get(name)
+            if not image:
+                continue
+            x, y = self.square_coords(square)[:2]
+            if self.free_piece_items:
+                item = self.free_piece_items.pop()
+                self.canvas.coords(item, x, y)
+                self.canvas.itemconfig(item, image=image, state=tk.NORMAL)
+            else:
+                item = self.canvas.create_image(x, y, anchor=tk.NW, image=image, tags="piece")
+                created = True
+            self.piece_items[square] = item
+        #Las imágenes nuevas quedan encima de todo: se vuelven a subir el resaltado y las estadísticas
+        if created:
+            self.canvas.tag_raise("highlight")
+            self.canvas.tag_raise("overlay")
         #Si hay una casilla seleccionada, se resalta y se muestran las posibles movidas
         if self.selected_square is not None:
             self.highlight_square(self.selected_square)
             self.highlight_moves(self.selected_square)
+        elif self.selected_visible:
+            self.canvas.itemconfig(self.selected_item, state=tk.HIDDEN)
+            self.selected_visible = False
+            self.show_move_highlights([])
+        self.draw_stats_overlay()
+    # Muestra u oculta las estadísticas; solo se recogen mientras están visibles para no frenar la búsqueda
+    def toggle_stats(self):
+        self.show_stats = not self.show_stats
+        self.engine.collect_stats = self.show_stats
+        self.draw_chessboard()
+    # Muestra en la esquina superior izquierda del tablero las estadísticas de la búsqueda de la última jugada de la IA
+    # y los resultados del ponder, o las oculta
+    def draw_stats_overlay(self):
+        if not self.show_stats:
+            if self.overlay_visible:
+                self.canvas.itemconfig("overlay", state=tk.HIDDEN)
+                self.overlay_visible = False
+            return
+        self.overlay_visible = True
+        text = self.last_move_stats.summary() if self.last_move_stats is not None else "Sin estadísticas todavía"
+        if AI_PONDER:
+            text += "\n" + self.ponder_summary()
+        self.canvas.itemconfig(self.stats_text, text=text, state=tk.NORMAL)
+        self.canvas.coords(self.stats_box, *self.canvas.bbox(self.stats_text))
+        self.canvas.itemconfig(self.stats_box, state=tk.NORMAL)
     # Devuelve el nombre de la pieza en el formato adecuado para cargar la imagen
     def get_piece_name(self, piece):
-        color = 'blanco' if piece.color == chess.WHITE else 'negro'
-        piece_type = {chess.QUEEN: 'reina', chess.ROOK: 'torre', chess.BISHOP: 'alfil', chess.KNIGHT: 'caballo', chess.PAWN: 'peon', chess.KING: 'rey'}[piece.piece_type]
-        return f"{piece_type}_{color}"
+        return piece_name(piece)
    
     # Maneja los clics del usuario en el tablero
     def on_click(self, event):
@@ -120,7 +156,7 @@ class LoseChessBoard:
         #  Si hay una casilla seleccionada, intenta mover la pieza seleccionada a la nueva casilla
             move = chess.Move(self.selected_square, square)
         #  Verifica la legalidad del movimiento
-            if move in self.board.legal_moves:
+            if move in self.board.move_index():
                 #  Si el movimiento es legal, lo ejecuta
                 self.board.push(move)
                 self.selected_square = None
@@ -130,6 +166,7 @@ class LoseChessBoard:
                 self.current_turn = not self.current_turn
                 #  Verifica si todas las piezas han sido capturadas
                 if self.is_all_pieces_captured():
+                    self.stop_ai_thread()  # Descarta el ponder en curso
                     self.handle_game_over() # Maneja el final del juego
                 else:
                 #  Si el juego no ha terminado, pasa el turno a la IA después de un breve retraso
@@ -138,12 +175,147 @@ class LoseChessBoard:
             else:
                 self.selected_square = None
                 self.draw_chessboard()
-    # Realiza un movimiento de la IA
+    # Realiza un movimiento de la IA: la búsqueda corre en un hilo aparte para que la ventana siga respondiendo
     def make_ai_move(self):
-    #Calcula el mejor movimiento para la IA
-        move = self.get_best_move(self.board, self.ai_color)
+    # Si la IA estaba pensando durante el turno del jugador, se decide si aprovechar esa búsqueda
+        if self.ponder_move is not None:
+            if self.resolve_ponder():
+                return
+        if self.ai_thread is not None:
+            return
+        self.start_ai_thread(self.board.copy(), AI_TIME_BUDGET_MS)
+    # Lanza la búsqueda de la jugada de la IA sobre una copia del tablero, para que la interfaz pueda seguir leyendo self.board
+    def start_ai_thread(self, board, time_budget_ms, ponder=False):
+        self.engine.stop_event.clear()
+        self.ai_cancelled = False
+        self.ai_thread = threading.Thread(target=self.run_ai_search, args=(board, time_budget_ms, ponder), daemon=True)
+        self.ai_thread.start()
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+        self.poll_id = self.root.after(AI_POLL_MS, self.poll_ai_search)
+    # Cuerpo del hilo de la IA: solo se comunica con la interfaz a través de la cola. Las estadísticas de la búsqueda van con
+    # la jugada, así que la interfaz nunca lee las de una búsqueda que sigue en marcha
+    def run_ai_search(self, board, time_budget_ms, ponder):
+        move, stats = None, None
+        try:
+            move = self.get_best_move(board, self.ai_color, time_budget_ms=time_budget_ms, ponder=ponder,
+                                      progress=lambda depth, best, nodes: self.ai_queue.put(("progress", depth, best, nodes)))
+            stats = self.engine.stats
+        finally:
+            self.ai_queue.put(("done", move, stats))
+    # Revisa periódicamente la cola: muestra el progreso en el título y aplica la jugada cuando la búsqueda termina
+    def poll_ai_search(self):
+        self.poll_id = None
+        try:
+            while True:
+                message = self.ai_queue.get_nowait()
+                if message[0] == "progress":
+                    _, depth, best, nodes = message
+                    state = "pensando durante tu turno" if self.ponder_move is not None else "pensando"
+                    self.root.title(f"{self.window_title} - IA {state}: profundidad {depth}, {best.uci()} ({nodes} nodos)")
+                else:
+                    self.finish_ai_thread()
+                    if self.ai_cancelled:
+                        return
+                # Un ponder que termina antes de que juegue el jugador guarda su jugada para cuando acierte
+                    if self.ponder_move is not None:
+                        self.ponder_result, self.ponder_result_stats = message[1], message[2]
+                    else:
+                        self.apply_ai_move(message[1], message[2])
+                    return
+        except queue.Empty:
+            pass
+        self.poll_id = self.root.after(AI_POLL_MS, self.poll_ai_search)
+    # Deja la interfaz lista para la siguiente búsqueda
+    def finish_ai_thread(self):
+        self.ai_thread = None
+        if self.ponder_timer is not None:
+            self.root.after_cancel(self.ponder_timer)
+            self.ponder_timer = None
+        self.root.title(self.window_title)
+    # Detiene la búsqueda en curso, espera al hilo y descarta sus mensajes
+    def stop_ai_thread(self):
+        self.ponder_move = None
+        if self.ai_thread is None:
+            return
+        self.ai_cancelled = True
+        self.engine.stop_event.set()
+        self.ai_thread.join()
+        while not self.ai_queue.empty():
+            self.ai_queue.get_nowait()
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
+        self.finish_ai_thread()
+    # Empieza a pensar durante el turno del jugador sobre la jugada que se espera de él
+    def start_ponder(self):
+        predicted = self.engine.predict_move(self.board)
+        if predicted is None:
+            return
+        board = self.board.copy()
+        board.push(predicted)
+        self.ponder_move, self.ponder_start, self.ponder_result = predicted, time.perf_counter(), None
+        self.ponder_result_stats = None
+        self.start_ai_thread(board, float('inf'), ponder=True)
+    # Compara la jugada del jugador con la esperada. Si acierta, la búsqueda del ponder se convierte en la búsqueda
+    # normal con el tiempo que le quede y devuelve True; si falla, se detiene y se buscará desde cero
+    def resolve_ponder(self):
+        hit = self.board.peek() == self.ponder_move
+        elapsed = time.perf_counter() - self.ponder_start
+        self.ponder_move = None
+        if not hit:
+            self.ponder_stats["misses"] += 1
+            self.stop_ai_thread()
+            self.report_ponder(False)
+            return False
+        self.ponder_stats["hits"] += 1
+        self.ponder_stats["time_saved"] += min(elapsed, AI_TIME_BUDGET_MS / 1000)
+        self.report_ponder(True)
+        if self.ai_thread is None:
+            self.apply_ai_move(self.ponder_result, self.ponder_result_stats)
+            return True
+        remaining_ms = AI_TIME_BUDGET_MS - elapsed * 1000
+        if remaining_ms <= 0:
+            self.engine.stop_event.set()
+        else:
+            self.ponder_timer = self.root.after(int(remaining_ms), self.force_ai_move)
+        return True
+    # Aciertos del ponder y tiempo ahorrado, en una línea
+    def ponder_summary(self):
+        hits, misses = self.ponder_stats["hits"], self.ponder_stats["misses"]
+        rate = f" ({hits / (hits + misses):.0%})" if hits + misses else ""
+        return f"ponder {hits}/{hits + misses} aciertos{rate}  {self.ponder_stats['time_saved']:.1f} s ahorrados"
+    # Escribe en el registro del motor la tasa de aciertos del ponder y el tiempo ahorrado, junto a las estadísticas de búsqueda
+    def report_ponder(self, hit):
+        if not self.engine.log_stats:
+            return
+        hits, misses = self.ponder_stats["hits"], self.ponder_stats["misses"]
+        logger.info(f"Ponder {'acertado' if hit else 'fallado'}: {hits}/{hits + misses} aciertos ({hits / (hits + misses):.0%}), "
+                    f"{self.ponder_stats['time_saved']:.1f} s ahorrados")
+    # Obliga a la IA a jugar inmediatamente la mejor jugada encontrada hasta ahora
+    def force_ai_move(self):
+        self.ponder_timer = None
+        if self.ai_thread is not None and self.ponder_move is None:
+            self.engine.stop_event.set()
+    # Cancela la búsqueda en curso y descarta su resultado
+    def cancel_ai_search(self):
+        self.ponder_move = None
+        if self.ai_thread is not None:
+            self.ai_cancelled = True
+            self.engine.stop_event.set()
+    # Cierra la ventana sin esperar a que termine la búsqueda
+    def on_close(self):
+        self.cancel_ai_search()
+        self.engine.close()
+        self.root.destroy()
+    # Calcula la mejor jugada para un color con el motor de búsqueda
+    def get_best_move(self, board, color, **limits):
+        return self.engine.get_best_move(board, color, **limits)
+    # Aplica en el tablero la jugada elegida por la IA; sus estadísticas quedan para el panel
+    def apply_ai_move(self, move, stats=None):
     #  Si hay un movimiento válido, lo ejecuta
         if move:
+            self.last_move_stats = stats
             self.board.push(move)
             self.update_move_counter(move)
             self.update_turn_counter()
@@ -152,23 +324,13 @@ class LoseChessBoard:
         #  Cambia el turno al jugador humano si el juego no ha terminado
             if self.board.is_game_over() or self.is_all_pieces_captured():
                 self.handle_game_over()
-     # Devuelve los movimientos legales sin incluir movimientos que pondrían al jugador en jaque
-    def get_legal_moves_no_check(self, board):
-            #  Guarda el estado original del turno del tablero
-        original_turn = board.turn
-         # Cambia el turno del tablero para simular el turno del oponente
-        board.turn = not original_turn
-        # Obtiene los movimientos legales del oponente
-        opponent_legal_moves = set(move.to_square for move in board.legal_moves)
-    # Restaura el estado original del turno del tablero
-        board.turn = original_turn
-    # Retorna los movimientos legales que no conducen al oponente a una posición donde el jugador esté en jaque
-        return [move for move in board.legal_moves if move.to_square not in opponent_legal_moves]
+            elif AI_PONDER:
+                self.start_ponder()
      # Elige el peor movimiento basado en la captura de la pieza de mayor valor
     def choose_worst_move(self, legal_moves):
         # Define una función interna para asignar un valor a cada tipo de pieza
         def piece_value(piece):
-            return {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 5, chess.KING: 0}[piece.piece_type]
+            return PIECE_VALUES[piece.piece_type]
         #  Inicializa las variables para almacenar el peor movimiento y el valor máximo de la pieza capturada
         worst_move, max_value = None, -1
         #  Itera sobre los movimientos legales
@@ -199,86 +361,27 @@ class LoseChessBoard:
     # Verifica si todas las piezas (excepto los reyes) han sido capturadas
     def is_all_pieces_captured(self):
     # Comprueba si hay alguna pieza que no sea un rey en el tablero
-        return not any(piece for piece in self.board.piece_map().values() if piece.piece_type != chess.KING)
+        return is_all_pieces_captured(self.board)
     # Resalta la casilla seleccionada
     def highlight_square(self, square):
-        col, row = chess.square_file(square), chess.square_rank(square)
-        self.canvas.create_rectangle(col * CELL_SIZE, (7 - row) * CELL_SIZE, (col + 1) * CELL_SIZE, (8 - row) * CELL_SIZE, outline=HIGHLIGHT_COLOR_SELECTED, width=3)
+        self.canvas.coords(self.selected_item, *self.square_coords(square))
+        self.canvas.itemconfig(self.selected_item, state=tk.NORMAL)
+        self.selected_visible = True
     # Resalta las posibles jugadas desde una casilla seleccionada
     def highlight_moves(self, square):
-    # Obtiene todos los movimientos legales en el tablero
-        legal_moves = self.board.legal_moves
-    # Itera sobre los movimientos legales
-        for move in legal_moves:
-        # Verifica si el movimiento comienza desde la casilla dada
-            if move.from_square == square:
-            # Obtiene la casilla destino del movimiento
-                to_square = move.to_square
-                col, row = chess.square_file(to_square), chess.square_rank(to_square)
-            # Dibujar un rectángulo alrededor de la casilla destino del movimiento
-                self.canvas.create_rectangle(col * CELL_SIZE, (7 - row) * CELL_SIZE, (col + 1) * CELL_SIZE, (8 - row) * CELL_SIZE, outline=HIGHLIGHT_COLOR_MOVE, width=3)
-    # Implementación del algoritmo minimax con poda alfa-beta
-    def minimax(self, depth, board, is_maximizing, alpha, beta):
-    # Condición de parada: alcanza la profundidad máxima o el juego ha terminado
-        if depth == 0 or board.is_game_over():
-            return self.evaluate_board(board)
-    # Obtener todos los movimientos legales sin poner en jaque al oponente
-        legal_moves = list(self.get_legal_moves_no_check(board))
-
-        if is_maximizing:
-        # Inicializar el valor mínimo para el jugador maximizador
-            min_eval = float('inf')
-            for move in legal_moves:
-            # Realizar el movimiento
-                board.push(move)
-            # Llamar recursivamente a minimax para el siguiente nivel (minimizando)
-                eval = self.minimax(depth - 1, board, False, alpha, beta)
-            # Deshacer el movimiento
-                board.pop()
-            # Actualizar el valor mínimo
-                min_eval = min(min_eval, eval)
-            # Actualizar el valor beta para la poda alfa-beta
-                beta = min(beta, eval)
-            # Realizar la poda alfa-beta si es posible
-                if beta <= alpha:
-                    break
-            return min_eval
-        else:
-        # Inicializar el valor máximo para el jugador minimizador
-            max_eval = float('-inf')
-            for move in legal_moves:
-            # Realizar el movimiento
-                board.push(move)
-            # Llamar recursivamente a minimax para el siguiente nivel (maximizando)
-                eval = self.minimax(depth - 1, board, True, alpha, beta)
-            # Deshacer el movimiento
-                board.pop()
-            # Actualizar el valor máximo
-                max_eval = max(max_eval, eval)
-            # Actualizar el valor alfa para la poda alfa-beta
-                alpha = max(alpha, eval)
-            # Realizar la poda alfa-beta si es posible
-                if beta <= alpha:
-                    break
-            return max_eval
-    # Obtiene el mejor movimiento basado en el algoritmo minimax
-    def get_best_move(self, board, color):
-        best_move = None
-    # Inicializar el mejor valor como infinito negativo para el jugador negro y como infinito positivo para el jugador blanco
-        best_value = float('inf') if color == chess.WHITE else float('-inf')
-    # Iterar sobre todos los movimientos legales disponibles
-        for move in self.get_legal_moves_no_check(board):
-        # Realizar el movimiento
-            board.push(move)
-        # Llamar a minimax para evaluar el estado del tablero después del movimiento
-            board_value = self.minimax(3, board, color == chess.WHITE, float('-inf'), float('inf'))
-        # Deshacer el movimiento
-            board.pop()
-        # Actualizar el mejor movimiento si el valor del tablero es mejor que el mejor valor actual
-            if (color == chess.WHITE and board_value < best_value) or (color == chess.BLACK and board_value > best_value):
-                best_value = board_value
-                best_move = move
-        return best_move
+    # Obtiene las casillas destino de los movimientos legales que comienzan en la casilla dada
+        self.show_move_highlights([move.to_square for move in self.board.move_index().from_square(square)])
+    # Coloca un marco sobre cada casilla destino reutilizando los marcos existentes y oculta los que sobran
+    def show_move_highlights(self, squares):
+        while len(self.move_items) < len(squares):
+            self.move_items.append(self.canvas.create_rectangle(0, 0, 0, 0, outline=HIGHLIGHT_COLOR_MOVE, width=3, state=tk.HIDDEN, tags="highlight"))
+            self.canvas.tag_raise("overlay")
+        for item, square in zip(self.move_items, squares):
+            self.canvas.coords(item, *self.square_coords(square))
+            self.canvas.itemconfig(item, state=tk.NORMAL)
+        for item in self.move_items[len(squares):self.visible_move_items]:
+            self.canvas.itemconfig(item, state=tk.HIDDEN)
+        self.visible_move_items = len(squares)
     # Maneja el final del juego
     def handle_game_over(self):
         winner = Determine_winner(self.board, self.move_counter)
@@ -288,47 +391,15 @@ class LoseChessBoard:
           messagebox.showinfo("Fin del juego", "¡Juego terminado!")
         self.root.quit()
 
-    # Evalúa el tablero asignando valores a las piezas
-    def evaluate_board(self, board):
-    # Valores de las piezas
-        piece_values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 5,
-            chess.KING: 0
-        }
-    # Inicializar la puntuación de la evaluación
-        evaluation = 0
-    # Iterar sobre todas las casillas del tablero
-        for square in chess.SQUARES:
-        # Obtener la pieza en la casilla actual
-            piece = board.piece_at(square)
-            if piece:
-            # Obtener el valor de la pieza según el tipo
-                value = piece_values[piece.piece_type]
-            # Sumar o restar el valor dependiendo del color de la pieza
-                evaluation += value if piece.color == chess.WHITE else -value
-        return evaluation
-    def Determine_winner(board, move_counter):
-    # Contadores de piezas capturadas por cada jugador
-        white_captured = move_counter.get('peon_negro', 0) + move_counter.get('alfil_negro', 0) + move_counter.get('caballo_negro', 0) + move_counter.get('torre_negro', 0) + move_counter.get('reina_negro', 0)
-        black_captured = move_counter.get('peon_blanco', 0) + move_counter.get('alfil_blanco', 0) + move_counter.get('caballo_blanco', 0) + move_counter.get('torre_blanco', 0) + move_counter.get('reina_blanco', 0)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ajedrez - Modo Humano vs IA")
+    parser.add_argument("--cell-size", type=int, default=CELL_SIZE, help="tamaño en píxeles de cada casilla del tablero")
+    args = parser.parse_args()
+    CELL_SIZE = args.cell_size
 
-    # Si solo queda una pieza en el tablero
-        if sum(1 for _ in board.piece_map()) == 2:
-        # Determina al ganador según la cantidad de piezas capturadas
-            if white_captured < black_captured:
-               return "Blancas"
-            elif black_captured < white_captured:
-               return "Negras"
-            else:
-               return "Empate"
-        else:
-            return None
+    if AI_LOG_STATS:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
 
-if __name__ == "__main__":
     root = tk.Tk()
     root.title("Ajedrez - Modo Humano vs IA")
 
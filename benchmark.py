@@ -0,0 +1,229 @@
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import chess
+from motor import CustomBoard, SearchEngine, generate_safe_moves, measure_parallel_speedup, opponent_targets, setup_custom_board
+
+# Posiciones fijas del banco de pruebas con sus conteos perft esperados (jugadas seguras de generate_safe_moves)
+SUITE = [
+    {"name": "inicio", "fen": setup_custom_board().fen(), "perft": [20, 372, 7284, 135178]},
+    {"name": "medio_juego_abierto", "fen": "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w - - 0 1", "perft": [22, 406, 8915, 169693]},
+    {"name": "medio_juego_cerrado", "fen": "r2q1rk1/pp2bppp/2n1bn2/3p4/3P4/2NBBN2/PP3PPP/R2Q1RK1 b - - 0 1", "perft": [25, 751, 17825, 495372]},
+    {"name": "final_peones", "fen": "8/5k2/3p4/1p1Pp2p/pP2Pp1P/P4P1K/8/8 b - - 0 1", "perft": [7, 14, 76, 380]},
+    {"name": "final_piezas", "fen": "4k3/8/8/3n4/8/8/2B5/4K3 w - - 0 1", "perft": [14, 163, 2039, 21941]},
+]
+
+# Posiciones con sus jugadas seguras y las casillas que alcanza el rival (opponent_targets), calculadas con la definición
+# directa: las jugadas legales del rival con el turno invertido. Cubren los casos con código propio en motor.py: enroque,
+# clavadas de los dos bandos, jaques, captura al paso, coronación, avances dobles y posiciones sin reyes
+SAFE_MOVES = [
+    {"name": "inicio", "fen": setup_custom_board().fen(),
+     "safe": "a2a3 a2a4 b1a3 b1c3 b2b3 b2b4 c2c3 c2c4 d2d3 d2d4 e2e3 e2e4 f2f3 f2f4 g1f3 g1h3 g2g3 g2g4 h2h3 h2h4",
+     "targets": "a5 b5 c5 d5 e5 f5 g5 h5 a6 b6 c6 d6 e6 f6 g6 h6"},
+    {"name": "enroque_blancas", "fen": "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1",
+     "safe": "a1a8 a1b1 a1c1 a1d1 e1c1 e1d1 e1d2 e1e2 e1f1 e1f2 e1g1 h1f1 h1g1 h1h8",
+     "targets": "a1 h1 a2 h2 a3 h3 a4 h4 a5 h5 a6 h6 a7 d7 e7 f7 h7 b8 c8 d8 f8 g8"},
+    {"name": "enroque_negras", "fen": "r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1",
+     "safe": "a8a1 a8b8 a8c8 a8d8 e8c8 e8d7 e8d8 e8e7 e8f7 e8f8 e8g8 h8f8 h8g8 h8h1",
+     "targets": "b1 c1 d1 f1 g1 a2 d2 e2 f2 h2 a3 h3 a4 h4 a5 h5 a6 h6 a7 h7 a8 h8"},
+    {"name": "medio_juego_enroque", "fen": "r1bqk2r/pppp1ppp/2n2n2/2b1p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 5",
+     "safe": "a2a4 b1c3 b2b3 c2c3 c4b3 c4d3 c4e2 c4e6 c4f1 c4f7 d1e2 d2d3 e1e2 e1f1 e1g1 f3e5 f3g1 f3h4 g2g3 h1f1 h1g1 h2h3 h2h4",
+     "targets": "f2 a3 e3 b4 d4 e4 g4 a5 b5 d5 g5 h5 a6 b6 d6 g6 h6 e7 b8 f8 g8"},
+    {"name": "pieza_propia_clavada", "fen": "4k3/4r3/8/8/8/8/4N3/4K3 w - - 0 1",
+     "safe": "e1d1 e1d2 e1f1 e1f2",
+     "targets": "e2 e3 e4 e5 e6 a7 b7 c7 d7 f7 g7 h7 d8 f8"},
+    {"name": "pieza_rival_clavada", "fen": "4k3/4n3/8/8/8/8/4R3/4K3 w - - 0 1",
+     "safe": "e1d1 e1d2 e1f1 e1f2 e2a2 e2b2 e2c2 e2d2 e2e3 e2e4 e2e5 e2e6 e2e7 e2f2 e2g2 e2h2",
+     "targets": "d7 f7 d8 f8"},
+    {"name": "peon_rival_clavado", "fen": "8/8/8/8/8/2k5/3p4/4B2K w - - 0 1",
+     "safe": "e1d2 e1f2 e1g3 e1h4 h1g1 h1g2 h1h2",
+     "targets": "e1 b2 c2 b3 d3 b4 c4 d4"},
+    {"name": "rey_rival_en_jaque", "fen": "4k3/8/8/8/8/8/8/4RK2 w - - 0 1",
+     "safe": "e1a1 e1b1 e1c1 e1d1 e1e2 e1e3 e1e4 e1e5 e1e6 e1e7 e1e8 f1e2 f1f2 f1g1 f1g2",
+     "targets": "d7 f7 d8 f8"},
+    {"name": "en_jaque", "fen": "4k3/8/8/8/8/8/3q4/4K3 w - - 0 1",
+     "safe": "e1d2 e1f1",
+     "targets": "c1 d1 e1 a2 b2 c2 e2 f2 g2 h2 c3 d3 e3 b4 d4 f4 a5 d5 g5 d6 h6 d7 e7 f7 d8 f8"},
+    {"name": "al_paso", "fen": "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1",
+     "safe": "e1d1 e1d2 e1e2 e1f1 e1f2 e5d6 e5e6",
+     "targets": "d4 d7 e7 f7 d8 f8"},
+    {"name": "coronacion", "fen": "4k3/1P6/8/8/8/8/6p1/4K3 w - - 0 1",
+     "safe": "b7b8b b7b8n b7b8q b7b8r e1d1 e1d2 e1e2 e1f2",
+     "targets": "g1 d7 e7 f7 d8 f8"},
+    {"name": "peones_avance_doble", "fen": "4k3/pppppppp/8/8/8/8/PPPPPPPP/4K3 b - - 0 1",
+     "safe": "a7a5 a7a6 b7b5 b7b6 c7c5 c7c6 d7d5 d7d6 e7e5 e7e6 e8d8 e8f8 f7f5 f7f6 g7g5 g7g6 h7h5 h7h6",
+     "targets": "d1 f1 a3 b3 c3 d3 e3 f3 g3 h3 a4 b4 c4 d4 e4 f4 g4 h4"},
+    {"name": "sin_reyes", "fen": "8/8/3n4/8/8/2B5/8/8 w - - 0 1",
+     "safe": "c3a1 c3a5 c3b2 c3b4 c3d2 c3d4 c3e1 c3e5 c3f6 c3g7 c3h8",
+     "targets": "c4 e4 b5 f5 b7 f7 c8 e8"},
+]
+
+
+# Cuenta las hojas del árbol de jugadas seguras hasta la profundidad indicada
+def perft(board, depth):
+    if depth == 0:
+        return 1
+    if depth == 1:
+        return len(generate_safe_moves(board))
+    nodes = 0
+    for move in generate_safe_moves(board):
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+    return nodes
+
+
+# Compara generate_safe_moves y opponent_targets con las posiciones de SAFE_MOVES; devuelve las diferencias encontradas
+def check_safe_moves():
+    problems = []
+    for position in SAFE_MOVES:
+        board = CustomBoard(position["fen"])
+        safe = sorted(move.uci() for move in generate_safe_moves(board))
+        if safe != sorted(position["safe"].split()):
+            problems.append(f"{position['name']}: jugadas seguras {' '.join(safe)}, se esperaban {position['safe']}")
+        targets = " ".join(chess.square_name(square) for square in chess.scan_forward(opponent_targets(board)))
+        if targets != position["targets"]:
+            problems.append(f"{position['name']}: casillas del rival {targets}, se esperaban {position['targets']}")
+    return problems
+
+
+# Busca la posición a profundidad fija con un motor nuevo y anota el tiempo acumulado al completar cada profundidad
+def timed_search(fen, depth):
+    engine, board = SearchEngine(book_path=None), CustomBoard(fen)
+    time_to_depth = {}
+    start = time.perf_counter()
+    move = engine.get_best_move(board, board.turn, time_budget_ms=float('inf'), max_nodes=float('inf'), max_depth=depth,
+                                progress=lambda d, best, nodes: time_to_depth.__setitem__(str(d), round(time.perf_counter() - start, 4)))
+    seconds = time.perf_counter() - start
+    return {
+        "depth": depth,
+        "best_move": move.uci() if move else None,
+        "nodes": engine.nodes,
+        "seconds": round(seconds, 4),
+        "nps": round(engine.nodes / seconds) if seconds else 0,
+        "time_to_depth": time_to_depth,
+    }
+
+
+# Pico de memoria asignada por Python durante la misma búsqueda (se repite aparte porque tracemalloc la ralentiza)
+def peak_memory(fen, depth):
+    tracemalloc.start()
+    engine, board = SearchEngine(book_path=None), CustomBoard(fen)
+    engine.get_best_move(board, board.turn, time_budget_ms=float('inf'), max_nodes=float('inf'), max_depth=depth)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run_suite(depth, perft_depth, memory=True):
+    results = []
+    for position in SUITE:
+        board = CustomBoard(position["fen"])
+        start = time.perf_counter()
+        counts = {str(d): perft(board, d) for d in range(1, perft_depth + 1)}
+        perft_seconds = time.perf_counter() - start
+        expected = {str(d): n for d, n in enumerate(position["perft"][:perft_depth], 1)}
+        result = {
+            "name": position["name"],
+            "fen": position["fen"],
+            "perft": counts,
+            "perft_ok": counts == expected if len(expected) == perft_depth else None,
+            "perft_seconds": round(perft_seconds, 4),
+            "search": timed_search(position["fen"], depth),
+        }
+        if memory:
+            result["peak_memory_bytes"] = peak_memory(position["fen"], depth)
+        results.append(result)
+    safe_moves_problems = check_safe_moves()
+    nodes = sum(result["search"]["nodes"] for result in results)
+    seconds = sum(result["search"]["seconds"] for result in results)
+    return {
+        "python": platform.python_version(),
+        "chess": chess.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "depth": depth,
+        "perft_depth": perft_depth,
+        "positions": results,
+        "totals": {"nodes": nodes, "seconds": round(seconds, 4), "nps": round(nodes / seconds) if seconds else 0},
+        "perft_ok": all(result["perft_ok"] is not False for result in results),
+        "safe_moves_problems": safe_moves_problems,
+    }
+
+
+# Compara con un resultado anterior: devuelve la lista de regresiones encontradas
+def compare(report, baseline, tolerance):
+    problems = []
+    previous = {position["name"]: position for position in baseline["positions"]}
+    for position in report["positions"]:
+        old = previous.get(position["name"])
+        if old is None:
+            continue
+        for depth, count in position["perft"].items():
+            if depth in old["perft"] and old["perft"][depth] != count:
+                problems.append(f"{position['name']}: perft({depth}) = {count}, antes {old['perft'][depth]}")
+        if old["search"]["depth"] == position["search"]["depth"] and position["search"]["nps"] < old["search"]["nps"] * (1 - tolerance):
+            problems.append(f"{position['name']}: {position['search']['nps']} nodos/s, antes {old['search']['nps']}")
+    return problems
+
+
+# Tabla de aceleración y eficiencia de la búsqueda en paralelo para cada número de procesos
+def print_parallel_speedup(fen, depth, worker_counts):
+    print(f"{'procesos':>8} {'jugada':>7} {'segundos':>9} {'nodos':>9} {'aceleración':>11} {'eficiencia':>10}")
+    for row in measure_parallel_speedup(fen, depth, worker_counts):
+        # Sin jugadas seguras no hay jugada que mostrar
+        move = row["move"] if row["move"] is not None else "-"
+        print(f"{row['workers']:>8} {move:>7} {row['seconds']:>9.2f} {row['nodes']:>9} {row['speedup']:>11.2f} {row['efficiency']:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de pruebas del motor: perft, nodos por segundo, tiempo por profundidad y memoria")
+    parser.add_argument("--depth", type=int, default=4, help="profundidad de la búsqueda cronometrada y de --parallel-speedup")
+    parser.add_argument("--perft-depth", type=int, default=3, help="profundidad de perft")
+    parser.add_argument("--output", help="archivo JSON donde guardar los resultados (por defecto, la salida estándar)")
+    parser.add_argument("--compare", help="resultado JSON anterior contra el que buscar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="caída de nodos por segundo tolerada al comparar (0.2 = 20%%)")
+    parser.add_argument("--no-memory", action="store_true", help="no medir el pico de memoria")
+    parser.add_argument("--parallel-speedup", action="store_true", help="mide la búsqueda en paralelo en lugar del banco de pruebas")
+    parser.add_argument("--fen", help="posición de --parallel-speedup (por defecto, la posición inicial personalizada)")
+    parser.add_argument("--workers", default="1,2,4,8", help="números de procesos de --parallel-speedup, separados por comas")
+    parser.add_argument("--safe-moves", action="store_true", help="solo comprueba las jugadas seguras de las posiciones de SAFE_MOVES")
+    args = parser.parse_args()
+
+    if args.safe_moves:
+        problems = check_safe_moves()
+        for problem in problems:
+            print(f"REGRESIÓN: {problem}", file=sys.stderr)
+        print(f"{len(SAFE_MOVES)} posiciones, {len(problems)} diferencias", file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+    if args.parallel_speedup:
+        print_parallel_speedup(args.fen or setup_custom_board().fen(), args.depth, [int(n) for n in args.workers.split(",")])
+        return
+
+    report = run_suite(args.depth, args.perft_depth, memory=not args.no_memory)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    for position in report["positions"]:
+        search = position["search"]
+        print(f"{position['name']:<22} perft {'ok' if position['perft_ok'] is not False else 'FALLA':<5} "
+              f"{search['nodes']:>8} nodos {search['seconds']:>7.2f} s {search['nps']:>7} nodos/s", file=sys.stderr)
+
+    problems = [] if report["perft_ok"] else ["perft no coincide con los valores esperados"]
+    problems += report["safe_moves_problems"]
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            problems += compare(report, json.load(file), args.tolerance)
+    for problem in problems:
+        print(f"REGRESIÓN: {problem}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import argparse
+import os
+import sys
+import time
+import chess
+from motor import BOOK_PATH, OpeningBook, SearchEngine, encode_book_move, setup_custom_board
+
+# Generador del libro de aperturas.
+# Recorre el árbol de la posición inicial personalizada hasta --plies jugadas:
+#   - en las posiciones donde mueve la IA se hace una búsqueda a profundidad fija y solo se sigue por la jugada elegida;
+#   - en las posiciones del rival se siguen todas sus jugadas seguras, así que el libro responde a cualquier apertura suya.
+# Cada iteración de la búsqueda suma 2**profundidad al peso de su mejor jugada. Como 2**d es mayor que la suma de todas las
+# profundidades anteriores, la jugada de más peso es siempre la de la iteración más profunda, la que habría jugado el motor;
+# las demás quedan con menos peso y solo se juegan si el motor elige del libro al azar (SearchEngine.book_rng).
+
+MAX_WEIGHT = 0xFFFF  # El peso se guarda en 16 bits
+
+
+# Recorre el árbol desde board y anota en entries, por clave de Zobrist, el peso de cada jugada del libro
+class BookBuilder:
+    def __init__(self, depth, plies, workers=1):
+        self.depth = depth
+        self.plies = plies
+        # Motor sin libro: el libro nuevo no debe salir del que se está reemplazando
+        self.engine = SearchEngine(workers=workers, book_path=None)
+        self.entries = {}  # clave -> {jugada: peso}
+        self.searches = 0
+
+    def close(self):
+        self.engine.close()
+
+    # Búsqueda de la posición con la tabla de transposición vacía, para que el resultado no dependa del orden del recorrido.
+    # Las posiciones a las que se llega por varios caminos se buscan una sola vez
+    def search(self, board):
+        key = board.zobrist_key()
+        if key not in self.entries:
+            weights = {}
+            def record(depth, move, nodes):
+                weights[move] = min(weights.get(move, 0) + 2 ** depth, MAX_WEIGHT)
+            self.engine.transposition_table.clear()
+            move = self.engine.get_best_move(board, board.turn, time_budget_ms=float('inf'), max_nodes=float('inf'),
+                                             max_depth=self.depth, progress=record)
+            # Con una sola jugada posible el motor no busca y no hay iteraciones que anotar
+            if not weights and move is not None:
+                weights[move] = 1
+            self.entries[key] = weights
+            self.searches += 1
+        weights = self.entries[key]
+        return max(weights, key=weights.get) if weights else None
+
+    def walk(self, board, ai_color, ply=0):
+        if ply >= self.plies or board.is_game_over():
+            return
+        if board.turn == ai_color:
+            move = self.search(board)
+            moves = [move] if move is not None else []
+        else:
+            moves = board.move_index().safe
+        for move in moves:
+            board.push(move)
+            self.walk(board, ai_color, ply + 1)
+            board.pop()
+
+
+# Escribe el libro de forma atómica: entradas ordenadas por clave y, dentro de cada clave, de mayor a menor peso
+def write_book(path, entries):
+    rows = sorted((key, -weight, encode_book_move(move)) for key, weights in entries.items() for move, weight in weights.items())
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        file.write(OpeningBook.MAGIC)
+        for key, weight, move in rows:
+            file.write(OpeningBook.ENTRY.pack(key, move, -weight))
+    os.replace(temp, path)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el libro de aperturas del motor con búsquedas a profundidad fija")
+    parser.add_argument("--plies", type=int, default=4, help="profundidad del árbol de aperturas, en jugadas de ambos bandos")
+    parser.add_argument("--depth", type=int, default=5, help="profundidad de la búsqueda en cada posición del libro")
+    parser.add_argument("--side", choices=["white", "black", "both"], default="both", help="bando que juega la IA")
+    parser.add_argument("--workers", type=int, default=1, help="procesos de la búsqueda en paralelo")
+    parser.add_argument("--output", default=BOOK_PATH, help="archivo del libro")
+    args = parser.parse_args()
+
+    colors = {"white": [chess.WHITE], "black": [chess.BLACK], "both": [chess.WHITE, chess.BLACK]}[args.side]
+    builder = BookBuilder(args.depth, args.plies, args.workers)
+    start = time.perf_counter()
+    try:
+        for color in colors:
+            builder.walk(setup_custom_board(), color)
+            print(f"{chess.COLOR_NAMES[color]:<6} {builder.searches} posiciones  {time.perf_counter() - start:8.1f} s", file=sys.stderr)
+    finally:
+        builder.close()
+    count = write_book(args.output, builder.entries)
+    print(f"{len(builder.entries)} posiciones y {count} jugadas en {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
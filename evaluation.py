@@ -0,0 +1,131 @@
+import argparse
+import sys
+import time
+import chess
+import numpy as np
+from motor import PIECE_VALUES, CustomBoard
+
+# Evaluación por lotes con NumPy: material más tablas de piezas y casillas.
+# Cada posición se guarda como 8 bitboards (los 6 tipos de pieza y la ocupación de cada color); el lote entero se
+# separa en 12 planos de pieza y color y se desempaqueta con np.unpackbits en una matriz de 768 casillas por posición,
+# que se multiplica por la matriz de pesos. El coste en Python por posición es copiar 8 enteros.
+# Los valores van en las mismas unidades que el motor: material de blancas menos negras.
+
+# Orden de los tipos de pieza en los bitboards y en los planos
+PLANE_PIECES = (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN, chess.KING)
+
+# Tablas de piezas y casillas desde el punto de vista de las blancas, en dieciseisavos de peón y con la fila 8 arriba
+# (las negras usan la casilla reflejada). Son correcciones pequeñas al valor de la pieza: el peón vale más cuanto más
+# cerca está de coronar y los caballos y alfiles valen algo más en el centro, donde tienen más casillas. Al ser
+# múltiplos de 1/16, las sumas son exactas en coma flotante y la búsqueda en serie y en paralelo coinciden.
+PIECE_SQUARE_SCALE = 16
+PIECE_SQUARE_TABLES = {
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        4, 4, 4, 4, 4, 4, 4, 4,
+        2, 2, 2, 2, 2, 2, 2, 2,
+        1, 1, 1, 1, 1, 1, 1, 1,
+        0, 0, 1, 1, 1, 1, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    chess.KNIGHT: [
+        -2, -1, -1, -1, -1, -1, -1, -2,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        -1, 0, 1, 2, 2, 1, 0, -1,
+        -1, 0, 1, 2, 2, 1, 0, -1,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -2, -1, -1, -1, -1, -1, -1, -2,
+    ],
+    chess.BISHOP: [
+        -1, -1, -1, -1, -1, -1, -1, -1,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        -1, 0, 1, 1, 1, 1, 0, -1,
+        -1, 0, 0, 0, 0, 0, 0, -1,
+        -1, -1, -1, -1, -1, -1, -1, -1,
+    ],
+    chess.ROOK: [0] * 64,
+    chess.QUEEN: [0] * 64,
+    chess.KING: [0] * 64,
+}
+
+# Tamaño de lote por defecto al evaluar archivos de FEN
+BATCH_SIZE = 4096
+
+
+# Bitboards de una posición en el orden que espera BatchEvaluator: 6 tipos de pieza, ocupación blanca y negra.
+# Sirve para CustomBoard y para SearchPosition, que tienen los mismos atributos
+def position_bitboards(board):
+    return (board.pawns, board.knights, board.bishops, board.rooks, board.queens, board.kings,
+            board.occupied_co[chess.WHITE], board.occupied_co[chess.BLACK])
+
+
+# Planos de pieza y color del lote: matriz (N, 12, 64) de 0 y 1, blancas primero y casillas en el orden de chess.SQUARES
+def piece_planes(bitboards):
+    bitboards = np.asarray(bitboards, dtype=np.uint64).reshape(-1, 8)
+    pieces, colors = bitboards[:, :6], bitboards[:, 6:]
+    planes = np.concatenate((pieces & colors[:, :1], pieces & colors[:, 1:]), axis=1).astype("<u8")
+    return np.unpackbits(planes.view(np.uint8).reshape(len(planes), 12, 8), axis=2, bitorder="little")
+
+
+class BatchEvaluator:
+    def __init__(self, piece_values=PIECE_VALUES, piece_square_tables=PIECE_SQUARE_TABLES):
+        weights = np.zeros((12, 64))
+        for plane, piece_type in enumerate(PLANE_PIECES):
+            # Las tablas se escriben con la fila 8 arriba: invertir las filas las deja en el orden de chess.SQUARES
+            table = np.asarray(piece_square_tables[piece_type], dtype=float).reshape(8, 8) / PIECE_SQUARE_SCALE
+            weights[plane] = piece_values[piece_type] + table[::-1].reshape(64)
+            # Para las negras la tabla se refleja (a1 <-> a8) y el valor resta
+            weights[6 + plane] = -(piece_values[piece_type] + table.reshape(64))
+        self.weights = weights.reshape(768)
+
+    # Fila del lote de una posición; el motor la guarda al recorrer las hojas y evalúa todas las filas juntas
+    encode = staticmethod(position_bitboards)
+
+    # Evaluación de un lote de bitboards (una fila de 8 por posición, como las de position_bitboards), como array de NumPy
+    def evaluate_bitboards(self, bitboards):
+        planes = piece_planes(bitboards)
+        return planes.reshape(len(planes), 768) @ self.weights
+
+    # Lo mismo con floats de Python, que es lo que usa minimax
+    def evaluate_encoded(self, rows):
+        return self.evaluate_bitboards(rows).tolist()
+
+    def evaluate(self, boards):
+        return self.evaluate_encoded([position_bitboards(board) for board in boards])
+
+
+# Evaluación material pura, la misma que usa el motor por defecto, para comparar resultados
+def material_evaluator():
+    return BatchEvaluator(piece_square_tables={piece_type: [0] * 64 for piece_type in PLANE_PIECES})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evalúa por lotes las posiciones de un archivo con una FEN por línea")
+    parser.add_argument("fens", help="archivo de posiciones (- para la entrada estándar)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="posiciones por lote")
+    parser.add_argument("--material", action="store_true", help="solo material, sin tablas de piezas y casillas")
+    args = parser.parse_args()
+
+    evaluator = material_evaluator() if args.material else BatchEvaluator()
+    source = sys.stdin if args.fens == "-" else open(args.fens, encoding="utf-8")
+    start, count = time.perf_counter(), 0
+    with source:
+        fens = [line.strip() for line in source if line.strip()]
+    for first in range(0, len(fens), args.batch_size):
+        batch = fens[first:first + args.batch_size]
+        for fen, score in zip(batch, evaluator.evaluate([CustomBoard(fen) for fen in batch])):
+            print(f"{score:g}\t{fen}")
+        count += len(batch)
+    seconds = time.perf_counter() - start
+    print(f"{count} posiciones en {seconds:.2f} s ({count / seconds if seconds else 0:.0f} posiciones/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import chess
+from motor import is_all_pieces_captured, setup_custom_board
+from server import HOST, PORT
+
+# Generador de carga para server.py: mantiene abiertas --games partidas a la vez durante --duration segundos.
+# El "humano" de cada partida juega jugadas legales al azar y, cuando la partida termina (o llega a --max-plies), abre otra.
+# La latencia de una jugada va desde que se envía la jugada del humano (o la orden new, si empieza la IA) hasta que llega
+# la respuesta de la IA, así que incluye la cola del servidor y la búsqueda.
+
+# Límite de jugadas por partida del generador, para que las partidas largas no dominen la medición
+MAX_PLIES = 200
+
+
+# Percentil por el método del rango más cercano
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class LoadGenerator:
+    def __init__(self, host, port, game_ms, move_ms, max_plies, seed):
+        self.host, self.port = host, port
+        self.game_ms, self.move_ms, self.max_plies = game_ms, move_ms, max_plies
+        self.rng = random.Random(seed)
+        self.latencies = []  # ms de cada jugada de la IA
+        self.finished = 0  # Partidas terminadas por las reglas
+        self.truncated = 0  # Partidas cortadas por --max-plies
+        self.errors = 0
+        self.workers = None  # Procesos del motor del servidor, según su mensaje started
+
+    async def run(self, games, duration):
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(self.client(deadline) for _ in range(games)))
+
+    # Juega partidas seguidas por una conexión hasta que se acaba el tiempo. Un error de conexión solo cuenta como
+    # error y se abre otra partida, sin parar a los demás clientes
+    async def client(self, deadline):
+        while time.perf_counter() < deadline:
+            try:
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                self.errors += 1
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                await self.play_game(reader, writer, deadline)
+            except (OSError, asyncio.IncompleteReadError, ValueError):
+                self.errors += 1
+                await asyncio.sleep(0.1)
+            finally:
+                writer.close()
+
+    async def send(self, writer, message):
+        writer.write((json.dumps(message) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def receive(self, reader):
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("el servidor cerró la conexión")
+        return json.loads(line)
+
+    async def play_game(self, reader, writer, deadline):
+        board = setup_custom_board()
+        human_color = self.rng.choice([chess.WHITE, chess.BLACK])
+        await self.send(writer, {"type": "new", "color": "white" if human_color == chess.WHITE else "black",
+                                 "game_ms": self.game_ms, "move_ms": self.move_ms})
+        sent = time.perf_counter()
+        while True:
+            message = await self.receive(reader)
+            kind = message["type"]
+            if kind == "started":
+                self.workers = message["workers"]
+                if board.turn != human_color:
+                    continue
+            elif kind == "move":
+                self.latencies.append((time.perf_counter() - sent) * 1000)
+                board.push(chess.Move.from_uci(message["move"]))
+                # Si la jugada de la IA termina la partida (mate o ahogado), el servidor manda a continuación su "over"
+                if board.is_game_over() or is_all_pieces_captured(board):
+                    continue
+            elif kind == "over":
+                self.finished += 1
+                return
+            else:
+                # Servidor lleno o jugada rechazada: se espera un poco antes de abrir otra partida
+                self.errors += 1
+                await asyncio.sleep(0.1)
+                return
+            # Las partidas que siguen en juego al acabar el tiempo no cuentan
+            if time.perf_counter() >= deadline:
+                await self.send(writer, {"type": "quit"})
+                return
+            if len(board.move_stack) >= self.max_plies:
+                self.truncated += 1
+                await self.send(writer, {"type": "quit"})
+                return
+            move = self.rng.choice(list(board.legal_moves))
+            board.push(move)
+            await self.send(writer, {"type": "move", "move": move.uci()})
+            sent = time.perf_counter()
+
+    def report(self, seconds, file=sys.stdout):
+        games = self.finished + self.truncated
+        print(f"{games} partidas ({self.finished} terminadas, {self.truncated} cortadas) y {len(self.latencies)} jugadas en {seconds:.1f} s, {self.errors} errores", file=file)
+        if self.latencies:
+            print(f"latencia por jugada: p50 {percentile(self.latencies, 0.5):.0f} ms  p99 {percentile(self.latencies, 0.99):.0f} ms  "
+                  f"máx. {max(self.latencies):.0f} ms  ({len(self.latencies) / seconds:.1f} jugadas/s)", file=file)
+        if self.workers:
+            per_minute = games / seconds * 60
+            print(f"{per_minute:.1f} partidas/min con {self.workers} procesos del motor: {per_minute / self.workers:.1f} partidas/min por núcleo", file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para el servidor de partidas")
+    parser.add_argument("--host", default=HOST, help="dirección del servidor")
+    parser.add_argument("--port", type=int, default=PORT, help="puerto del servidor")
+    parser.add_argument("--games", type=int, default=32, help="partidas simultáneas")
+    parser.add_argument("--duration", type=float, default=60, help="segundos de carga")
+    parser.add_argument("--game-ms", type=int, default=10000, help="reloj de la IA por partida")
+    parser.add_argument("--move-ms", type=int, default=200, help="tiempo máximo de la IA por jugada")
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES, help="jugadas tras las que se abandona una partida")
+    parser.add_argument("--seed", type=int, default=1, help="semilla de las jugadas al azar")
+    args = parser.parse_args()
+
+    generator = LoadGenerator(args.host, args.port, args.game_ms, args.move_ms, args.max_plies, args.seed)
+    start = time.perf_counter()
+    try:
+        asyncio.run(generator.run(args.games, args.duration))
+    except KeyboardInterrupt:
+        pass
+    generator.report(time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1519 @@
+import chess
+import cProfile
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import pstats
+import random
+import struct
+import threading
+import time
+
+# Memoria máxima (en MB) de la tabla de transposición usada por minimax
+TT_SIZE_MB = 16
+# Tipos de cota que se guardan en la tabla de transposición
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+# Límites de la búsqueda de la IA: tiempo por jugada en milisegundos, nodos máximos y profundidad máxima
+AI_TIME_BUDGET_MS = 1500
+AI_MAX_NODES = 500000
+AI_MAX_DEPTH = 32
+# Registro donde el motor escribe una línea JSON con las estadísticas de cada búsqueda (si log_stats está activo)
+logger = logging.getLogger("motor")
+# Tabla de finales que el motor abre al crearse si el archivo existe (se genera con tablebase.py)
+TABLEBASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "finales.bin")
+# Libro de aperturas que el motor abre al crearse si el archivo existe (se genera con book.py)
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "libro.bin")
+# Profundidad a partir de la cual merece la pena repartir una iteración entre los procesos del motor
+PARALLEL_MIN_DEPTH = 3
+# Valores de las piezas usados por la evaluación y para ordenar capturas
+PIECE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 5,
+    chess.KING: 0
+}
+
+# Claves aleatorias de Zobrist: una por pieza/color/casilla, más el turno, la casilla de captura al paso y los enroques
+_zobrist_random = random.Random(20240611)
+ZOBRIST_PIECES = {(piece_type, color): [_zobrist_random.getrandbits(64) for _ in chess.SQUARES]
+                  for piece_type in chess.PIECE_TYPES for color in chess.COLORS}
+ZOBRIST_TURN = _zobrist_random.getrandbits(64)
+ZOBRIST_EP = [_zobrist_random.getrandbits(64) for _ in chess.SQUARES]
+ZOBRIST_CASTLING = [_zobrist_random.getrandbits(64) for _ in chess.SQUARES]
+# Clase para representar una versión personalizada del rey
+class CustomKing(chess.Piece):
+    def __init__(self, color):
+        super().__init__(chess.KING, color)
+# Tablero que mantiene su clave de Zobrist, el material y el conteo de piezas actualizados en cada push y pop
+class CustomBoard(chess.Board):
+    # Recalcula la clave desde cero cuando el tablero se reinicia o se carga desde un FEN
+    def _reset_board(self):
+        super()._reset_board()
+        self._recompute_state()
+
+    def _clear_board(self):
+        super()._clear_board()
+        self._recompute_state()
+
+    def _set_board_fen(self, fen):
+        super()._set_board_fen(fen)
+        self._recompute_state()
+
+    def _recompute_state(self):
+        self._piece_key = 0
+        self._state_stack = []
+        self._move_index = None
+        # material[color] es la suma de valores de las piezas; counts[color * 7 + tipo] cuenta las piezas de cada tipo
+        self.material = [0, 0]
+        self.counts = [0] * 14
+        for square, piece in self.piece_map().items():
+            self._piece_key ^= ZOBRIST_PIECES[piece.piece_type, piece.color][square]
+            self.material[piece.color] += PIECE_VALUES[piece.piece_type]
+            self.counts[piece.color * 7 + piece.piece_type] += 1
+
+    # Cada vez que una pieza entra o sale de una casilla se actualizan la clave (con un XOR), el material y los conteos
+    def _remove_piece_at(self, square):
+        color = bool(self.occupied_co[chess.WHITE] & chess.BB_SQUARES[square])
+        piece_type = super()._remove_piece_at(square)
+        if piece_type:
+            self._piece_key ^= ZOBRIST_PIECES[piece_type, color][square]
+            self.material[color] -= PIECE_VALUES[piece_type]
+            self.counts[color * 7 + piece_type] -= 1
+        return piece_type
+
+    def _set_piece_at(self, square, piece_type, color, promoted=False):
+        super()._set_piece_at(square, piece_type, color, promoted)
+        self._piece_key ^= ZOBRIST_PIECES[piece_type, color][square]
+        self.material[color] += PIECE_VALUES[piece_type]
+        self.counts[color * 7 + piece_type] += 1
+
+    # Guarda el estado antes de mover para poder restaurarlo en pop sin recalcular;
+    # las listas guardadas no se modifican, se trabaja sobre copias de tamaño fijo
+    def push(self, move):
+        self._state_stack.append((self._piece_key, self.material, self.counts))
+        self.material = self.material[:]
+        self.counts = self.counts[:]
+        self._move_index = None
+        super().push(move)
+
+    def pop(self):
+        move = super().pop()
+        self._piece_key, self.material, self.counts = self._state_stack.pop()
+        self._move_index = None
+        return move
+
+    # Índice de jugadas de la posición actual. Se calcula una vez por jugada y se descarta en push y pop;
+    # la clave de Zobrist guardada con él detecta además los cambios hechos a mano (por ejemplo, invertir board.turn)
+    def move_index(self):
+        key = self.zobrist_key()
+        if self._move_index is None or self._move_index[0] != key:
+            self._move_index = (key, MoveIndex(self))
+        return self._move_index[1]
+
+    # Número de piezas de un tipo y color
+    def piece_count(self, piece_type, color):
+        return self.counts[color * 7 + piece_type]
+
+    # Número total de piezas en el tablero, con o sin contar los reyes
+    def total_pieces(self, include_kings=True):
+        total = sum(self.counts)
+        if not include_kings:
+            total -= self.counts[chess.KING] + self.counts[7 + chess.KING]
+        return total
+
+    # Evaluación material: positiva si las blancas tienen más material
+    def material_balance(self):
+        return self.material[chess.WHITE] - self.material[chess.BLACK]
+
+    def clear_stack(self):
+        super().clear_stack()
+        self._state_stack = []
+
+    def copy(self, *, stack=True):
+        board = super().copy(stack=stack)
+        board._piece_key = self._piece_key
+        board.material = self.material[:]
+        board.counts = self.counts[:]
+        board._move_index = self._move_index  # El índice no guarda referencias al tablero, así que la copia puede compartirlo
+        if stack:
+            stack = len(self.move_stack) if stack is True else stack
+            board._state_stack = self._state_stack[-stack:] if stack else []
+        return board
+
+    # Clave de Zobrist de la posición: piezas, turno, captura al paso y derechos de enroque
+    def zobrist_key(self):
+        key = self._piece_key
+        if self.turn == chess.BLACK:
+            key ^= ZOBRIST_TURN
+        # La casilla al paso solo cuenta si algún peón del bando que mueve puede capturar en ella
+        if self.ep_square is not None and self.pawns & self.occupied_co[self.turn] & chess.BB_PAWN_ATTACKS[not self.turn][self.ep_square]:
+            key ^= ZOBRIST_EP[self.ep_square]
+        for square in chess.scan_forward(self.castling_rights):
+            key ^= ZOBRIST_CASTLING[square]
+        return key
+# Jugadas ya construidas para todas las parejas de casillas: el generador de SearchPosition las reutiliza en lugar de crear objetos nuevos
+_MOVES = [[chess.Move(from_square, to_square) for to_square in chess.SQUARES] for from_square in chess.SQUARES]
+_PROMOTIONS = {(from_square, to_square): [chess.Move(from_square, to_square, promotion) for promotion in (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT)]
+               for from_square in chess.SQUARES for to_square in chess.SQUARES
+               if chess.square_rank(to_square) in (0, 7) and abs(chess.square_file(from_square) - chess.square_file(to_square)) <= 1}
+
+# Posición compacta que usa solo la búsqueda: bitboards enteros en atributos con __slots__ y una pila de deshacer de tuplas.
+# push/pop no crean estados intermedios como chess.Board y el material, los conteos y la clave de Zobrist se deshacen sin copiar listas.
+# Expone los mismos nombres que chess.Board que usan generate_safe_moves, opponent_targets y minimax, y genera las jugadas
+# en el mismo orden que python-chess, así que la búsqueda recorre exactamente el mismo árbol.
+# Se crea a partir de un CustomBoard al empezar la búsqueda y nunca se devuelve fuera del motor.
+class SearchPosition:
+    __slots__ = ("pawns", "knights", "bishops", "rooks", "queens", "kings", "occupied", "occupied_co",
+                 "turn", "castling_rights", "ep_square", "halfmove_clock", "piece_key", "key",
+                 "material", "counts", "undo", "history", "boundary")
+
+    def __init__(self, board=None):
+        if board is None:
+            return
+        self.pawns, self.knights, self.bishops = board.pawns, board.knights, board.bishops
+        self.rooks, self.queens, self.kings = board.rooks, board.queens, board.kings
+        self.occupied = board.occupied
+        self.occupied_co = [board.occupied_co[chess.BLACK], board.occupied_co[chess.WHITE]]
+        self.turn = board.turn
+        self.castling_rights = board.clean_castling_rights()
+        self.ep_square = board.ep_square
+        self.halfmove_clock = board.halfmove_clock
+        self.piece_key = board._piece_key
+        self.material = board.material[:]
+        self.counts = board.counts[:]
+        self.undo = []
+        self.key = self.compute_key()
+        # Claves de las posiciones de la partida desde la última jugada irreversible, para detectar la quíntuple repetición
+        self.history = []
+        replay = board.copy()
+        while replay.move_stack:
+            move = replay.pop()
+            if replay.is_irreversible(move):
+                break
+            self.history.append(replay.zobrist_key())
+        self.history.reverse()
+        self.history.append(self.key)
+        self.boundary = 0
+
+    # Copia sin historial: la usa opponent_targets para mirar la posición con el turno cambiado
+    def copy(self, *, stack=False):
+        position = SearchPosition()
+        position.pawns, position.knights, position.bishops = self.pawns, self.knights, self.bishops
+        position.rooks, position.queens, position.kings = self.rooks, self.queens, self.kings
+        position.occupied, position.occupied_co = self.occupied, self.occupied_co[:]
+        position.turn, position.castling_rights, position.ep_square = self.turn, self.castling_rights, self.ep_square
+        position.halfmove_clock, position.piece_key, position.key = self.halfmove_clock, self.piece_key, self.key
+        position.material, position.counts = self.material[:], self.counts[:]
+        position.undo, position.history, position.boundary = [], [self.key], 0
+        return position
+
+    # Misma clave que CustomBoard.zobrist_key, para compartir la tabla de transposición con el tablero de la partida
+    def compute_key(self):
+        key = self.piece_key
+        if self.turn == chess.BLACK:
+            key ^= ZOBRIST_TURN
+        if self.ep_square is not None and self.pawns & self.occupied_co[self.turn] & chess.BB_PAWN_ATTACKS[not self.turn][self.ep_square]:
+            key ^= ZOBRIST_EP[self.ep_square]
+        for square in chess.scan_forward(self.castling_rights):
+            key ^= ZOBRIST_CASTLING[square]
+        return key
+
+    def zobrist_key(self):
+        return self.key
+
+    def material_balance(self):
+        return self.material[chess.WHITE] - self.material[chess.BLACK]
+
+    def piece_count(self, piece_type, color):
+        return self.counts[color * 7 + piece_type]
+
+    def pieces_mask(self, piece_type, color):
+        if piece_type == chess.PAWN:
+            bb = self.pawns
+        elif piece_type == chess.KNIGHT:
+            bb = self.knights
+        elif piece_type == chess.BISHOP:
+            bb = self.bishops
+        elif piece_type == chess.ROOK:
+            bb = self.rooks
+        elif piece_type == chess.QUEEN:
+            bb = self.queens
+        else:
+            bb = self.kings
+        return bb & self.occupied_co[color]
+
+    def piece_type_at(self, square):
+        mask = chess.BB_SQUARES[square]
+        if not self.occupied & mask:
+            return None
+        elif self.pawns & mask:
+            return chess.PAWN
+        elif self.knights & mask:
+            return chess.KNIGHT
+        elif self.bishops & mask:
+            return chess.BISHOP
+        elif self.rooks & mask:
+            return chess.ROOK
+        elif self.queens & mask:
+            return chess.QUEEN
+        return chess.KING
+
+    # Cambia los bits de mask en el bitboard del tipo de pieza indicado
+    def _toggle(self, piece_type, mask):
+        if piece_type == chess.PAWN:
+            self.pawns ^= mask
+        elif piece_type == chess.KNIGHT:
+            self.knights ^= mask
+        elif piece_type == chess.BISHOP:
+            self.bishops ^= mask
+        elif piece_type == chess.ROOK:
+            self.rooks ^= mask
+        elif piece_type == chess.QUEEN:
+            self.queens ^= mask
+        else:
+            self.kings ^= mask
+
+    def is_en_passant(self, move):
+        return (self.ep_square == move.to_square and
+                bool(self.pawns & chess.BB_SQUARES[move.from_square]) and
+                abs(move.to_square - move.from_square) in (7, 9) and
+                not self.occupied & chess.BB_SQUARES[move.to_square])
+
+    def is_capture(self, move):
+        touched = chess.BB_SQUARES[move.from_square] ^ chess.BB_SQUARES[move.to_square]
+        return bool(touched & self.occupied_co[not self.turn]) or self.is_en_passant(move)
+
+    def is_castling(self, move):
+        if self.kings & chess.BB_SQUARES[move.from_square]:
+            diff = chess.square_file(move.from_square) - chess.square_file(move.to_square)
+            return abs(diff) > 1 or bool(self.rooks & self.occupied_co[self.turn] & chess.BB_SQUARES[move.to_square])
+        return False
+
+    # Hace la jugada: guarda en la pila de deshacer los bitboards y el estado que cambian y actualiza clave, material y conteos
+    def push(self, move):
+        us, them = self.turn, not self.turn
+        from_square, to_square, promotion = move.from_square, move.to_square, move.promotion
+        from_bb, to_bb = chess.BB_SQUARES[from_square], chess.BB_SQUARES[to_square]
+        occupied_co = self.occupied_co
+        ours, theirs = occupied_co[us], occupied_co[them]
+        piece_type = self.piece_type_at(from_square)
+        castling = piece_type == chess.KING and (to_bb & self.rooks & ours or abs(chess.square_file(from_square) - chess.square_file(to_square)) > 1)
+        captured, capture_square = None, to_square
+        if to_bb & theirs:
+            captured = self.piece_type_at(to_square)
+        elif piece_type == chess.PAWN and to_square == self.ep_square and abs(to_square - from_square) in (7, 9):
+            captured, capture_square = chess.PAWN, to_square + (-8 if us == chess.WHITE else 8)
+        # Jugada irreversible (como en chess.Board.is_irreversible): avance de peón, captura, pérdida de enroque o captura al paso posible
+        irreversible = piece_type == chess.PAWN or captured is not None or self.has_legal_en_passant()
+        self.undo.append((self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings, self.occupied,
+                          occupied_co[chess.BLACK], occupied_co[chess.WHITE], self.castling_rights, self.ep_square,
+                          self.halfmove_clock, self.piece_key, self.key, self.boundary, captured, promotion, piece_type))
+        # Derechos de enroque
+        rights = self.castling_rights & ~to_bb & ~from_bb
+        if piece_type == chess.KING:
+            rights &= ~(chess.BB_RANK_1 if us == chess.WHITE else chess.BB_RANK_8)
+        elif captured == chess.KING:
+            if us == chess.WHITE and chess.square_rank(to_square) == 7:
+                rights &= ~chess.BB_RANK_8
+            elif us == chess.BLACK and chess.square_rank(to_square) == 0:
+                rights &= ~chess.BB_RANK_1
+        if rights != self.castling_rights:
+            irreversible = True
+        self.castling_rights = rights
+        # Casilla al paso y regla de las 75 jugadas
+        ep_square = None
+        if piece_type == chess.PAWN and abs(to_square - from_square) == 16:
+            ep_square = (from_square + to_square) // 2
+        self.ep_square = ep_square
+        self.halfmove_clock = 0 if piece_type == chess.PAWN or captured is not None else self.halfmove_clock + 1
+        pieces = ZOBRIST_PIECES
+        key = self.piece_key
+        if captured is not None:
+            capture_bb = chess.BB_SQUARES[capture_square]
+            self._toggle(captured, capture_bb)
+            theirs ^= capture_bb
+            key ^= pieces[captured, them][capture_square]
+            self.material[them] -= PIECE_VALUES[captured]
+            self.counts[them * 7 + captured] -= 1
+        if castling:
+            backrank = 0 if us == chess.WHITE else 56
+            a_side = chess.square_file(to_square) < chess.square_file(from_square)
+            rook_square = to_square if to_bb & self.rooks & ours else backrank + (0 if a_side else 7)
+            king_to, rook_to = backrank + (2 if a_side else 6), backrank + (3 if a_side else 5)
+            king_move = from_bb | chess.BB_SQUARES[king_to]
+            rook_move = chess.BB_SQUARES[rook_square] ^ chess.BB_SQUARES[rook_to]
+            self.kings ^= king_move if from_square != king_to else 0
+            self.rooks ^= rook_move
+            ours ^= (king_move if from_square != king_to else 0) ^ rook_move
+            key ^= pieces[chess.KING, us][from_square] ^ pieces[chess.KING, us][king_to]
+            key ^= pieces[chess.ROOK, us][rook_square] ^ pieces[chess.ROOK, us][rook_to]
+        else:
+            self._toggle(piece_type, from_bb)
+            placed = promotion or piece_type
+            self._toggle(placed, to_bb)
+            ours ^= from_bb | to_bb
+            key ^= pieces[piece_type, us][from_square] ^ pieces[placed, us][to_square]
+            if promotion:
+                self.material[us] += PIECE_VALUES[promotion] - PIECE_VALUES[chess.PAWN]
+                self.counts[us * 7 + chess.PAWN] -= 1
+                self.counts[us * 7 + promotion] += 1
+        occupied_co[us], occupied_co[them] = ours, theirs
+        self.occupied = ours | theirs
+        self.piece_key = key
+        self.turn = them
+        self.key = self.compute_key()
+        self.history.append(self.key)
+        if irreversible:
+            self.boundary = len(self.history) - 1
+
+    # Deshace la última jugada restaurando lo guardado en la pila; el material y los conteos se corrigen a mano
+    def pop(self):
+        (self.pawns, self.knights, self.bishops, self.rooks, self.queens, self.kings, self.occupied,
+         black, white, self.castling_rights, self.ep_square, self.halfmove_clock, self.piece_key, self.key,
+         self.boundary, captured, promotion, piece_type) = self.undo.pop()
+        self.occupied_co[chess.BLACK], self.occupied_co[chess.WHITE] = black, white
+        self.history.pop()
+        them, us = self.turn, not self.turn
+        self.turn = us
+        if captured is not None:
+            self.material[them] += PIECE_VALUES[captured]
+            self.counts[them * 7 + captured] += 1
+        if promotion:
+            self.material[us] -= PIECE_VALUES[promotion] - PIECE_VALUES[chess.PAWN]
+            self.counts[us * 7 + chess.PAWN] += 1
+            self.counts[us * 7 + promotion] -= 1
+
+    def has_legal_en_passant(self):
+        if self.ep_square is None or not self.generate_pseudo_legal_ep():
+            return False
+        return any(self.is_en_passant(move) for move in self.generate_legal_moves(chess.BB_ALL, chess.BB_SQUARES[self.ep_square]))
+
+    def attacks_mask(self, square):
+        bb_square = chess.BB_SQUARES[square]
+        if bb_square & self.pawns:
+            return chess.BB_PAWN_ATTACKS[bool(bb_square & self.occupied_co[chess.WHITE])][square]
+        elif bb_square & self.knights:
+            return chess.BB_KNIGHT_ATTACKS[square]
+        elif bb_square & self.kings:
+            return chess.BB_KING_ATTACKS[square]
+        attacks = 0
+        if bb_square & (self.bishops | self.queens):
+            attacks = chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & self.occupied]
+        if bb_square & (self.rooks | self.queens):
+            attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & self.occupied] |
+                        chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & self.occupied])
+        return attacks
+
+    def attackers_mask(self, color, square, occupied=None):
+        occupied = self.occupied if occupied is None else occupied
+        queens_and_rooks = self.queens | self.rooks
+        queens_and_bishops = self.queens | self.bishops
+        attackers = ((chess.BB_KING_ATTACKS[square] & self.kings) |
+                     (chess.BB_KNIGHT_ATTACKS[square] & self.knights) |
+                     (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] & queens_and_rooks) |
+                     (chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied] & queens_and_rooks) |
+                     (chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied] & queens_and_bishops) |
+                     (chess.BB_PAWN_ATTACKS[not color][square] & self.pawns))
+        return attackers & self.occupied_co[color]
+
+    def pin_mask(self, color, square):
+        king_mask = self.occupied_co[color] & self.kings
+        if not king_mask:
+            return chess.BB_ALL
+        king = chess.msb(king_mask)
+        square_mask = chess.BB_SQUARES[square]
+        for attacks, sliders in ((chess.BB_FILE_ATTACKS, self.rooks | self.queens),
+                                 (chess.BB_RANK_ATTACKS, self.rooks | self.queens),
+                                 (chess.BB_DIAG_ATTACKS, self.bishops | self.queens)):
+            rays = attacks[king][0]
+            if rays & square_mask:
+                snipers = rays & sliders & self.occupied_co[not color]
+                for sniper in chess.scan_reversed(snipers):
+                    if chess.between(sniper, king) & (self.occupied | square_mask) == square_mask:
+                        return chess.ray(king, sniper)
+                break
+        return chess.BB_ALL
+
+    def _slider_blockers(self, king):
+        rooks_and_queens = self.rooks | self.queens
+        bishops_and_queens = self.bishops | self.queens
+        snipers = ((chess.BB_RANK_ATTACKS[king][0] & rooks_and_queens) |
+                   (chess.BB_FILE_ATTACKS[king][0] & rooks_and_queens) |
+                   (chess.BB_DIAG_ATTACKS[king][0] & bishops_and_queens))
+        blockers = 0
+        for sniper in chess.scan_reversed(snipers & self.occupied_co[not self.turn]):
+            b = chess.between(king, sniper) & self.occupied
+            if b and chess.BB_SQUARES[chess.msb(b)] == b:
+                blockers |= b
+        return blockers & self.occupied_co[self.turn]
+
+    def _ep_skewered(self, king, capturer):
+        last_double = self.ep_square + (-8 if self.turn == chess.WHITE else 8)
+        occupancy = (self.occupied & ~chess.BB_SQUARES[last_double] & ~chess.BB_SQUARES[capturer] | chess.BB_SQUARES[self.ep_square])
+        horizontal_attackers = self.occupied_co[not self.turn] & (self.rooks | self.queens)
+        if chess.BB_RANK_ATTACKS[king][chess.BB_RANK_MASKS[king] & occupancy] & horizontal_attackers:
+            return True
+        diagonal_attackers = self.occupied_co[not self.turn] & (self.bishops | self.queens)
+        return bool(chess.BB_DIAG_ATTACKS[king][chess.BB_DIAG_MASKS[king] & occupancy] & diagonal_attackers)
+
+    def _is_safe(self, king, blockers, move):
+        if move.from_square == king:
+            if self.is_castling(move):
+                return True
+            return not self.attackers_mask(not self.turn, move.to_square)
+        elif self.is_en_passant(move):
+            return bool(self.pin_mask(self.turn, move.from_square) & chess.BB_SQUARES[move.to_square] and
+                        not self._ep_skewered(king, move.from_square))
+        return bool(not blockers & chess.BB_SQUARES[move.from_square] or
+                    chess.ray(move.from_square, move.to_square) & chess.BB_SQUARES[king])
+
+    # Jugadas pseudolegales en una lista, en el mismo orden que chess.Board.generate_pseudo_legal_moves
+    def generate_pseudo_legal_moves(self, from_mask=chess.BB_ALL, to_mask=chess.BB_ALL):
+        turn = self.turn
+        our_pieces = self.occupied_co[turn]
+        moves = []
+        for from_square in chess.scan_reversed(our_pieces & ~self.pawns & from_mask):
+            row = _MOVES[from_square]
+            for to_square in chess.scan_reversed(self.attacks_mask(from_square) & ~our_pieces & to_mask):
+                moves.append(row[to_square])
+        if from_mask & self.kings:
+            moves += self.generate_castling_moves(from_mask, to_mask)
+        pawns = self.pawns & our_pieces & from_mask
+        if not pawns:
+            return moves
+        theirs = self.occupied_co[not turn]
+        for from_square in chess.scan_reversed(pawns):
+            for to_square in chess.scan_reversed(chess.BB_PAWN_ATTACKS[turn][from_square] & theirs & to_mask):
+                if to_square < 8 or to_square >= 56:
+                    moves += _PROMOTIONS[from_square, to_square]
+                else:
+                    moves.append(_MOVES[from_square][to_square])
+        if turn == chess.WHITE:
+            single_moves = pawns << 8 & ~self.occupied
+            double_moves = single_moves << 8 & ~self.occupied & (chess.BB_RANK_3 | chess.BB_RANK_4)
+            step = -8
+        else:
+            single_moves = pawns >> 8 & ~self.occupied
+            double_moves = single_moves >> 8 & ~self.occupied & (chess.BB_RANK_6 | chess.BB_RANK_5)
+            step = 8
+        for to_square in chess.scan_reversed(single_moves & to_mask):
+            if to_square < 8 or to_square >= 56:
+                moves += _PROMOTIONS[to_square + step, to_square]
+            else:
+                moves.append(_MOVES[to_square + step][to_square])
+        for to_square in chess.scan_reversed(double_moves & to_mask):
+            moves.append(_MOVES[to_square + 2 * step][to_square])
+        if self.ep_square:
+            moves += self.generate_pseudo_legal_ep(from_mask, to_mask)
+        return moves
+
+    def generate_pseudo_legal_ep(self, from_mask=chess.BB_ALL, to_mask=chess.BB_ALL):
+        ep_square = self.ep_square
+        if not ep_square or not chess.BB_SQUARES[ep_square] & to_mask or chess.BB_SQUARES[ep_square] & self.occupied:
+            return []
+        capturers = (self.pawns & self.occupied_co[self.turn] & from_mask &
+                     chess.BB_PAWN_ATTACKS[not self.turn][ep_square] & chess.BB_RANKS[4 if self.turn else 3])
+        return [_MOVES[capturer][ep_square] for capturer in chess.scan_reversed(capturers)]
+
+    def generate_castling_moves(self, from_mask=chess.BB_ALL, to_mask=chess.BB_ALL):
+        backrank = chess.BB_RANK_1 if self.turn == chess.WHITE else chess.BB_RANK_8
+        king = self.occupied_co[self.turn] & self.kings & backrank & from_mask
+        king &= -king
+        if not king or not self.castling_rights & backrank & to_mask:
+            return []
+        moves = []
+        king_square = chess.msb(king)
+        for candidate in chess.scan_reversed(self.castling_rights & backrank & to_mask):
+            rook = chess.BB_SQUARES[candidate]
+            a_side = rook < king
+            king_to = chess.BB_FILE_C & backrank if a_side else chess.BB_FILE_G & backrank
+            rook_to = chess.BB_FILE_D & backrank if a_side else chess.BB_FILE_F & backrank
+            king_path = chess.between(king_square, chess.msb(king_to))
+            rook_path = chess.between(candidate, chess.msb(rook_to))
+            if not ((self.occupied ^ king ^ rook) & (king_path | rook_path | king_to | rook_to) or
+                    self._attacked_for_king(king_path | king, self.occupied ^ king) or
+                    self._attacked_for_king(king_to, self.occupied ^ king ^ rook ^ rook_to)):
+                # Igual que chess.Board._from_chess960: con el rey en e1/e8 el enroque se escribe como jugada de dos casillas
+                if king_square in (chess.E1, chess.E8):
+                    moves.append(_MOVES[king_square][chess.msb(king_to)])
+                else:
+                    moves.append(_MOVES[king_square][candidate])
+        return moves
+
+    def _attacked_for_king(self, path, occupied):
+        return any(self.attackers_mask(not self.turn, square, occupied) for square in chess.scan_reversed(path))
+
+    def _generate_evasions(self, king, checkers, from_mask=chess.BB_ALL, to_mask=chess.BB_ALL):
+        sliders = checkers & (self.bishops | self.rooks | self.queens)
+        attacked = 0
+        for checker in chess.scan_reversed(sliders):
+            attacked |= chess.ray(king, checker) & ~chess.BB_SQUARES[checker]
+        moves = []
+        if chess.BB_SQUARES[king] & from_mask:
+            for to_square in chess.scan_reversed(chess.BB_KING_ATTACKS[king] & ~self.occupied_co[self.turn] & ~attacked & to_mask):
+                moves.append(_MOVES[king][to_square])
+        checker = chess.msb(checkers)
+        if chess.BB_SQUARES[checker] == checkers:
+            target = chess.between(king, checker) | checkers
+            moves += self.generate_pseudo_legal_moves(~self.kings & from_mask, target & to_mask)
+            if self.ep_square and not chess.BB_SQUARES[self.ep_square] & target:
+                last_double = self.ep_square + (-8 if self.turn == chess.WHITE else 8)
+                if last_double == checker:
+                    moves += self.generate_pseudo_legal_ep(from_mask, to_mask)
+        return moves
+
+    def generate_legal_moves(self, from_mask=chess.BB_ALL, to_mask=chess.BB_ALL):
+        king_mask = self.kings & self.occupied_co[self.turn]
+        if not king_mask:
+            return self.generate_pseudo_legal_moves(from_mask, to_mask)
+        king = chess.msb(king_mask)
+        blockers = self._slider_blockers(king)
+        checkers = self.attackers_mask(not self.turn, king)
+        if checkers:
+            moves = self._generate_evasions(king, checkers, from_mask, to_mask)
+        else:
+            moves = self.generate_pseudo_legal_moves(from_mask, to_mask)
+        return [move for move in moves if self._is_safe(king, blockers, move)]
+
+    # Si hay alguna jugada legal. Sin jaque, cualquier pieza no clavada (ni rey ni peón) con una casilla libre o rival basta
+    def has_legal_move(self):
+        king_mask = self.kings & self.occupied_co[self.turn]
+        if king_mask:
+            king = chess.msb(king_mask)
+            if not self.attackers_mask(not self.turn, king):
+                ours = self.occupied_co[self.turn]
+                for square in chess.scan_reversed(ours & ~self.pawns & ~self.kings & ~self._slider_blockers(king)):
+                    if self.attacks_mask(square) & ~ours:
+                        return True
+        return bool(self.generate_legal_moves())
+
+    def has_insufficient_material(self, color):
+        if self.occupied_co[color] & (self.pawns | self.rooks | self.queens):
+            return False
+        if self.occupied_co[color] & self.knights:
+            return (chess.popcount(self.occupied_co[color]) <= 2 and
+                    not (self.occupied_co[not color] & ~self.kings & ~self.queens))
+        if self.occupied_co[color] & self.bishops:
+            same_color = (not self.bishops & chess.BB_DARK_SQUARES) or (not self.bishops & chess.BB_LIGHT_SQUARES)
+            return same_color and not self.pawns and not self.knights
+        return True
+
+    # Equivale a chess.Board.is_game_over(): sin jugadas legales, material insuficiente, 75 jugadas o quíntuple repetición
+    def is_game_over(self):
+        if self.halfmove_clock >= 150:
+            return True
+        if self.has_insufficient_material(chess.WHITE) and self.has_insufficient_material(chess.BLACK):
+            return True
+        if len(self.history) - self.boundary >= 16 and self.history[self.boundary:].count(self.key) >= 5:
+            return True
+        return not self.has_legal_move()
+# Estadísticas de una búsqueda: solo se recogen si el motor tiene collect_stats activo
+class SearchStats:
+    def __init__(self):
+        self.tt_cutoffs = 0  # Nodos resueltos directamente con la tabla de transposición
+        self.cutoffs_by_ply = {}  # Podas alfa-beta por ply
+        self.cutoffs_by_index = {}  # Podas alfa-beta según la posición de la jugada en el orden (0 = primera jugada)
+        self.expanded_by_ply = {}  # Por ply: [nodos expandidos, jugadas generadas]
+        self.iterations = []  # Por iteración: (profundidad, nodos acumulados, segundos acumulados, mejor jugada)
+        self.movegen_seconds = 0.0  # Tiempo generando y ordenando jugadas (incluye is_game_over)
+        self.eval_seconds = 0.0  # Tiempo evaluando hojas
+        self.nodes, self.tt_hits, self.seconds, self.depth = 0, 0, 0.0, 0
+        self.tablebase_hits = 0  # Nodos resueltos con la tabla de finales
+        self.best_move, self.pv = None, []
+        self.from_book = False  # La jugada salió del libro de aperturas, sin búsqueda
+        self.ponder = False  # Búsqueda hecha durante el turno del rival (puede descartarse si el rival juega otra cosa)
+
+    # Resumen serializable en JSON
+    def as_dict(self):
+        cutoffs = sum(self.cutoffs_by_index.values())
+        previous, branching = None, {}
+        for depth, nodes, _, _ in self.iterations:
+            if previous:
+                branching[depth] = round(nodes / previous, 2)
+            previous = nodes
+        return {
+            "best_move": self.best_move.uci() if self.best_move else None,
+            "from_book": self.from_book,
+            "ponder": self.ponder,
+            "depth": self.depth,
+            "nodes": self.nodes,
+            "seconds": round(self.seconds, 4),
+            "nps": round(self.nodes / self.seconds) if self.seconds else 0,
+            "tt_hits": self.tt_hits,
+            "tt_cutoffs": self.tt_cutoffs,
+            "tablebase_hits": self.tablebase_hits,
+            "cutoffs": cutoffs,
+            "first_move_cutoff_rate": round(self.cutoffs_by_index.get(0, 0) / cutoffs, 3) if cutoffs else None,
+            "cutoffs_by_ply": dict(sorted(self.cutoffs_by_ply.items())),
+            "cutoffs_by_index": dict(sorted(self.cutoffs_by_index.items())),
+            "branching_by_ply": {ply: round(moves / expanded, 2) for ply, (expanded, moves) in sorted(self.expanded_by_ply.items())},
+            "effective_branching_by_depth": branching,
+            "time_to_depth": {depth: round(seconds, 4) for depth, _, seconds, _ in self.iterations},
+            "movegen_seconds": round(self.movegen_seconds, 4),
+            "eval_seconds": round(self.eval_seconds, 4),
+            "pv": [move.uci() for move in self.pv],
+        }
+
+    # Resumen breve en varias líneas para mostrarlo sobre el tablero
+    def summary(self):
+        data = self.as_dict()
+        return (f"{'libro de aperturas' if data['from_book'] else 'prof. ' + str(data['depth'])}  {data['nodes']} nodos  {data['nps']} n/s\n"
+                f"podas {data['cutoffs']} (1.ª jugada {data['first_move_cutoff_rate']})  TT {data['tt_hits']}/{data['tt_cutoffs']}  finales {data['tablebase_hits']}\n"
+                f"generación {data['movegen_seconds']:.2f} s  evaluación {data['eval_seconds']:.2f} s\n"
+                f"VP {' '.join(data['pv'])}")
+# Se lanza dentro de minimax cuando se agota el tiempo o el límite de nodos de la búsqueda
+class SearchTimeout(Exception):
+    pass
+# Tabla de transposición acotada: cada entrada guarda profundidad, puntuación, tipo de cota y mejor movimiento
+class TranspositionTable:
+    # Tamaño aproximado en bytes de una entrada (tupla de 6 elementos más sus enteros)
+    ENTRY_BYTES = 160
+
+    def __init__(self, size_mb=TT_SIZE_MB):
+        # El número de casillas es una potencia de dos para indexar con una máscara
+        slots = max(1, (size_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        self.size = 1 << (slots.bit_length() - 1)
+        self.mask = self.size - 1
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+
+    # Comienza una nueva búsqueda: las entradas de búsquedas anteriores pasan a ser reemplazables
+    def new_search(self):
+        self.generation = (self.generation + 1) & 0xFF
+        self.hits = 0
+
+    def clear(self):
+        self.slots = [None] * self.size
+        self.generation = 0
+        self.hits = 0
+
+    # Devuelve la entrada (key, depth, score, flag, move, generation) o None si la posición no está guardada
+    def probe(self, key):
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    # Política de reemplazo: se sobrescribe una casilla vacía, la misma posición, una entrada de una búsqueda
+    # anterior o una entrada menos profunda; si no, se conserva la entrada más profunda
+    def store(self, key, depth, score, flag, move):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            if move is None and entry is not None and entry[0] == key:
+                move = entry[4]
+            self.slots[index] = (key, depth, score, flag, move, self.generation)
+# Tabla de finales: valor exacto y distancia a la conversión de cada posición con pocas piezas, generada por tablebase.py.
+# El archivo se abre con mmap y cada posición ocupa dos bytes, así que consultarla no carga la tabla en memoria.
+# El valor está en las unidades de minimax (material de blancas menos negras al final; ±infinito si el bando que mueve
+# se queda sin jugadas seguras) y supone que ambos bandos juegan las jugadas seguras de generate_safe_moves.
+class Tablebase:
+    MAGIC = b"LCTB1\n"
+    UNKNOWN, MINUS_INF, PLUS_INF = -128, -127, 127  # Valores especiales del byte de valor
+    NO_DISTANCE = 255  # Distancia cuando ningún bando puede forzar una captura, coronación o final
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"{path} no es una tabla de finales")
+        header_size, = struct.unpack_from("<I", self.data, len(self.MAGIC))
+        start = len(self.MAGIC) + 4
+        header = json.loads(self.data[start:start + header_size].decode("utf-8"))
+        # Por cada clase de material: dónde empieza su bloque y en qué orden entran las piezas en el índice
+        self.classes = {signature: (start + header_size + entry["offset"], [tuple(piece) for piece in entry["layout"]])
+                        for signature, entry in header["classes"].items()}
+        self.max_pieces = max((len(layout) for _, layout in self.classes.values()), default=0)
+
+    # Abre la tabla si el archivo existe; si no, el motor busca sin ella
+    @classmethod
+    def open(cls, path):
+        if path is None or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def close(self):
+        self.data.close()
+
+    # (valor, distancia) de la posición, o None si no está en la tabla
+    def lookup(self, board):
+        if chess.popcount(board.occupied) > self.max_pieces or board.castling_rights:
+            return None
+        entry = self.classes.get(material_signature(board))
+        if entry is None:
+            return None
+        offset, layout = entry
+        value, distance = struct.unpack_from("<bB", self.data, offset + 2 * tablebase_index(board, layout))
+        if value == self.UNKNOWN:
+            return None
+        return decode_tablebase_value(value), distance
+
+    # Solo el valor, que es lo que necesita minimax
+    def probe(self, board):
+        entry = self.lookup(board)
+        return entry[0] if entry is not None else None
+
+# Letras de la firma de material, de la pieza más valiosa a la menos valiosa
+SIGNATURE_LETTERS = ((chess.QUEEN, "Q"), (chess.ROOK, "R"), (chess.BISHOP, "B"), (chess.KNIGHT, "N"), (chess.PAWN, "P"))
+
+# Firma de material de la posición, por ejemplo KRvKP (blancas a la izquierda); None si algún bando no tiene exactamente un rey
+def material_signature(board):
+    sides = []
+    for color in (chess.WHITE, chess.BLACK):
+        if chess.popcount(board.pieces_mask(chess.KING, color)) != 1:
+            return None
+        sides.append("K" + "".join(letter * chess.popcount(board.pieces_mask(piece_type, color)) for piece_type, letter in SIGNATURE_LETTERS))
+    return "v".join(sides)
+
+# Índice de la posición dentro del bloque de su clase: turno y casillas de las piezas en el orden de layout.
+# Las piezas iguales se toman en orden de casilla creciente, así que cada posición tiene un único índice
+def tablebase_index(board, layout):
+    index = int(board.turn)
+    previous, squares = None, None
+    for piece in layout:
+        if piece != previous:
+            squares = chess.scan_forward(board.pieces_mask(*piece))
+            previous = piece
+        index = index * 64 + next(squares)
+    return index
+
+def decode_tablebase_value(value):
+    if value == Tablebase.MINUS_INF:
+        return float('-inf')
+    if value == Tablebase.PLUS_INF:
+        return float('inf')
+    return value
+
+def encode_tablebase_value(value):
+    if value == float('-inf'):
+        return Tablebase.MINUS_INF
+    if value == float('inf'):
+        return Tablebase.PLUS_INF
+    return int(value)
+
+# Libro de aperturas generado por book.py: entradas de 12 bytes (clave de Zobrist, jugada, peso) ordenadas por clave.
+# Se abre con mmap y se consulta con una búsqueda binaria, sin cargar el archivo en memoria
+class OpeningBook:
+    MAGIC = b"LCBK1\n"
+    ENTRY = struct.Struct("<QHH")
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"{path} no es un libro de aperturas")
+        self.size = (len(self.data) - len(self.MAGIC)) // self.ENTRY.size
+
+    # Abre el libro si el archivo existe; si no, el motor busca desde la primera jugada
+    @classmethod
+    def open(cls, path):
+        if path is None or not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def close(self):
+        self.data.close()
+
+    def entry(self, index):
+        return self.ENTRY.unpack_from(self.data, len(self.MAGIC) + index * self.ENTRY.size)
+
+    # Jugadas guardadas para una clave, con su peso, en el orden del archivo (de mayor a menor peso)
+    def moves(self, key):
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if self.entry(middle)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        result = []
+        while low < self.size:
+            entry_key, move, weight = self.entry(low)
+            if entry_key != key:
+                break
+            result.append((decode_book_move(move), weight))
+            low += 1
+        return result
+
+    # Jugada del libro para la posición: la de más peso o, con rng, una al azar según los pesos.
+    # Solo se aceptan jugadas seguras de la posición, por si dos posiciones comparten clave
+    def choose(self, board, rng=None):
+        safe = board.move_index().safe if isinstance(board, CustomBoard) else generate_safe_moves(board)
+        candidates = [(move, weight) for move, weight in self.moves(board.zobrist_key()) if move in safe]
+        if not candidates:
+            return None
+        if rng is None:
+            return candidates[0][0]
+        return rng.choices([move for move, _ in candidates], weights=[weight for _, weight in candidates])[0]
+
+# Jugada en 16 bits: casilla de origen, casilla de destino y pieza de coronación
+def encode_book_move(move):
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+def decode_book_move(value):
+    return chess.Move(value & 63, value >> 6 & 63, value >> 12 or None)
+
+# Casillas atacadas por un color con la ocupación actual (equivale a board.is_attacked_by para cada casilla)
+def attacked_squares(board, color):
+    pieces = board.occupied_co[color]
+    pawns = board.pawns & pieces
+    if color == chess.WHITE:
+        attacks = (((pawns & ~chess.BB_FILE_A) << 7) | ((pawns & ~chess.BB_FILE_H) << 9)) & chess.BB_ALL
+    else:
+        attacks = ((pawns & ~chess.BB_FILE_A) >> 9) | ((pawns & ~chess.BB_FILE_H) >> 7)
+    for square in chess.scan_reversed(pieces & board.knights):
+        attacks |= chess.BB_KNIGHT_ATTACKS[square]
+    for square in chess.scan_reversed(pieces & board.kings):
+        attacks |= chess.BB_KING_ATTACKS[square]
+    for square in chess.scan_reversed(pieces & (board.bishops | board.rooks | board.queens)):
+        attacks |= board.attacks_mask(square)
+    return attacks
+
+# Casillas a las que el rival podría mover si fuera su turno, calculadas con máscaras de ataque
+# sin cambiar board.turn. Equivale a reunir los to_square de board.legal_moves con el turno invertido.
+def opponent_targets(board):
+    us, them = board.turn, not board.turn
+    occupied, ours, theirs = board.occupied, board.occupied_co[us], board.occupied_co[them]
+    king_mask = board.kings & theirs
+    king = chess.msb(king_mask) if king_mask else None
+    our_attacks = attacked_squares(board, us)
+    # Casos poco frecuentes (rey rival en jaque o con derechos de enroque): se usa la generación completa sobre una copia
+    if king_mask & our_attacks or board.castling_rights & (chess.BB_RANK_1 if them == chess.WHITE else chess.BB_RANK_8):
+        flipped = board.copy(stack=False)
+        flipped.turn = them
+        targets = 0
+        for move in flipped.generate_legal_moves():
+            targets |= chess.BB_SQUARES[move.to_square]
+        return targets
+    # Piezas rivales clavadas contra su rey por nuestras piezas de largo alcance: solo pueden moverse sobre la línea de la clavada
+    pins = {}
+    if king is not None:
+        snipers = ((chess.BB_RANK_ATTACKS[king][0] & (board.rooks | board.queens)) |
+                   (chess.BB_FILE_ATTACKS[king][0] & (board.rooks | board.queens)) |
+                   (chess.BB_DIAG_ATTACKS[king][0] & (board.bishops | board.queens))) & ours
+        for sniper in chess.scan_reversed(snipers):
+            blocker = chess.between(king, sniper) & occupied
+            if blocker and blocker & theirs and chess.BB_SQUARES[chess.msb(blocker)] == blocker:
+                pins[chess.msb(blocker)] = chess.ray(king, sniper)
+    targets = 0
+    # Caballos, alfiles, torres y damas: sus casillas atacadas que no ocupen piezas propias
+    for square in chess.scan_reversed(theirs & ~board.pawns & ~board.kings):
+        attacks = board.attacks_mask(square) & ~theirs
+        if square in pins:
+            attacks &= pins[square]
+        targets |= attacks
+    # Peones no clavados: avances simples, dobles y capturas calculados para todos a la vez desplazando bits
+    pawns = board.pawns & theirs
+    free_pawns = pawns
+    for square in pins:
+        free_pawns &= ~chess.BB_SQUARES[square]
+    if them == chess.WHITE:
+        single = (free_pawns << 8) & ~occupied & chess.BB_ALL
+        double = ((single & chess.BB_RANK_3) << 8) & ~occupied
+        captures = (((free_pawns & ~chess.BB_FILE_A) << 7) | ((free_pawns & ~chess.BB_FILE_H) << 9)) & ours
+    else:
+        single = (free_pawns >> 8) & ~occupied
+        double = ((single & chess.BB_RANK_6) >> 8) & ~occupied
+        captures = (((free_pawns & ~chess.BB_FILE_A) >> 9) | ((free_pawns & ~chess.BB_FILE_H) >> 7)) & ours
+    targets |= single | double | captures
+    # Peones clavados: se calculan uno a uno y se limitan a la línea de la clavada
+    for square in chess.scan_reversed(pawns & ~free_pawns):
+        step = 8 if them == chess.WHITE else -8
+        moves = chess.BB_PAWN_ATTACKS[them][square] & ours
+        if not chess.BB_SQUARES[square + step] & occupied:
+            moves |= chess.BB_SQUARES[square + step]
+            start_rank = 1 if them == chess.WHITE else 6
+            if chess.square_rank(square) == start_rank and not chess.BB_SQUARES[square + 2 * step] & occupied:
+                moves |= chess.BB_SQUARES[square + 2 * step]
+        targets |= moves & pins[square]
+    # Rey rival: casillas vecinas libres de piezas propias que no estén atacadas por nosotros
+    if king is not None:
+        targets |= chess.BB_KING_ATTACKS[king] & ~theirs & ~our_attacks
+    return targets
+
+# Movimientos legales cuyo destino no puede alcanzar el rival; el turno del tablero nunca se modifica
+def generate_safe_moves(board):
+    targets = opponent_targets(board)
+    # Con derechos de enroque el to_mask de python-chess se aplica a la torre, así que se filtra por to_square
+    if board.castling_rights:
+        return [move for move in board.generate_legal_moves() if not chess.BB_SQUARES[move.to_square] & targets]
+    to_mask = ~targets & chess.BB_ALL
+    us = board.turn
+    king_mask = board.kings & board.occupied_co[us]
+    if not king_mask:
+        return list(board.generate_pseudo_legal_moves(chess.BB_ALL, to_mask))
+    king = chess.msb(king_mask)
+    their_attacks = attacked_squares(board, not us)
+    # En jaque se delega en el generador legal completo
+    if king_mask & their_attacks:
+        return list(board.generate_legal_moves(chess.BB_ALL, to_mask))
+    # Sin jaque el rey solo puede ir a casillas no atacadas, y solo hay que comprobar
+    # una a una las jugadas de piezas clavadas y las capturas al paso
+    king_to_mask = to_mask & ~their_attacks
+    blockers = board._slider_blockers(king)
+    checked = blockers
+    if board.ep_square is not None:
+        checked |= board.pawns & chess.BB_PAWN_ATTACKS[not us][board.ep_square]
+    return [move for move in board.generate_pseudo_legal_moves(chess.BB_ALL, to_mask)
+            if (chess.BB_SQUARES[move.to_square] & king_to_mask if move.from_square == king else
+                not chess.BB_SQUARES[move.from_square] & checked or board._is_safe(king, blockers, move))]
+
+# Jugadas de una posición agrupadas por casilla de origen y de destino, para consultarlas con un acceso a diccionario.
+# legal son todas las jugadas legales (las que puede hacer el jugador) y safe las de generate_safe_moves, en el mismo orden
+class MoveIndex:
+    def __init__(self, board):
+        self.legal = list(board.generate_legal_moves())
+        self.moves = set(self.legal)
+        targets = opponent_targets(board)
+        self.safe = [move for move in self.legal if not chess.BB_SQUARES[move.to_square] & targets]
+        self.by_from, self.by_to = {}, {}
+        for move in self.legal:
+            self.by_from.setdefault(move.from_square, []).append(move)
+            self.by_to.setdefault(move.to_square, []).append(move)
+
+    def __contains__(self, move):
+        return move in self.moves
+
+    # Jugadas legales que salen de una casilla
+    def from_square(self, square):
+        return self.by_from.get(square, [])
+
+    # Jugadas legales que llegan a una casilla
+    def to_square(self, square):
+        return self.by_to.get(square, [])
+
+# Motor de búsqueda de la IA: minimax con poda alfa-beta, tabla de transposición y profundización iterativa
+class SearchEngine:
+    def __init__(self, tt_size_mb=TT_SIZE_MB, workers=1, tablebase_path=TABLEBASE_PATH, book_path=BOOK_PATH, evaluator=None):
+        self.transposition_table = TranspositionTable(tt_size_mb)  # Tabla de transposición compartida entre búsquedas
+        self.tablebase = Tablebase.open(tablebase_path)  # Tabla de finales, o None si no se ha generado
+        self.book = OpeningBook.open(book_path)  # Libro de aperturas, o None si no se ha generado
+        self.book_rng = None  # Con un random.Random, las jugadas del libro se eligen al azar según su peso
+        # Evaluador por lotes (evaluation.BatchEvaluator: encode, evaluate_encoded y evaluate); None = solo material
+        self.evaluator = evaluator
+        self.nodes = 0  # Nodos visitados por la última búsqueda
+        self.search_depth = 0  # Profundidad completada por la última búsqueda
+        self.deadline, self.max_nodes = float('inf'), float('inf')  # Límites de la búsqueda en curso
+        self.killers, self.history = [], {}  # Jugadas asesinas por ply e historial de cortes para ordenar jugadas
+        self.stop_event = threading.Event()  # Detiene la búsqueda en curso (forzar jugada o cancelar)
+        self.workers = workers  # Procesos para repartir las jugadas de la raíz (1 = búsqueda en serie)
+        self.pool, self.shared_bound, self.search_id = None, None, 0
+        # Nodos de la búsqueda en paralelo: el total compartido por todos los procesos y la parte ya sumada por este
+        self.shared_nodes, self.reported_nodes = None, 0
+        # Instrumentación opcional: estadísticas por búsqueda, una línea de registro por jugada y perfilado con cProfile
+        # stats es la última búsqueda terminada; search_stats, la que está en curso, que solo escribe el hilo de la búsqueda
+        self.collect_stats, self.log_stats, self.stats, self.search_stats = False, False, None, None
+        self.profile_path, self.last_profile = None, None
+        if workers > 1:
+        # Los procesos comparten la mejor cota de la raíz, el límite de nodos y la orden de parada; cada uno tiene su propia tabla de transposición
+            self.shared_bound = multiprocessing.Value('d', 0.0)
+            self.shared_nodes = multiprocessing.Value('q', 0)
+            self.stop_event = multiprocessing.Event()
+            self.pool = multiprocessing.Pool(workers, initializer=_init_search_worker, initargs=(self.shared_bound, self.shared_nodes, self.stop_event, tt_size_mb, tablebase_path, evaluator))
+    # Cierra los procesos del motor, si los hay
+    def close(self):
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+    # Jugada que se espera del rival: la mejor guardada en la tabla de transposición o, si no hay, la primera ordenada
+    def predict_move(self, board):
+        entry = self.transposition_table.probe(board.zobrist_key())
+        if entry is not None and entry[4] is not None and (entry[4] in board.move_index() if isinstance(board, CustomBoard) else board.is_legal(entry[4])):
+            return entry[4]
+        moves = self.root_moves(board)
+        return self.order_moves(board, moves, None, 0)[0] if moves else None
+    # Reinicia los contadores, heurísticas de orden y límites antes de una búsqueda
+    def begin_search(self, time_budget_ms, max_nodes, max_depth):
+        self.nodes = 0
+        self.killers = [[None, None] for _ in range(max_depth + 1)]
+        self.history = {}
+        self.deadline = time.perf_counter() + time_budget_ms / 1000
+        self.max_nodes = max_nodes
+    # Comprobación periódica de la búsqueda: reloj, orden de parada y, en un proceso de la búsqueda en paralelo, el total de nodos
+    # de todos los procesos, que es al que se aplica max_nodes
+    def limits_reached(self):
+        if self.shared_nodes is not None and self.report_nodes() >= self.max_nodes:
+            return True
+        return time.perf_counter() >= self.deadline or self.stop_event.is_set()
+    # Suma al total compartido los nodos de este proceso que aún no se habían sumado y devuelve el total
+    def report_nodes(self):
+        with self.shared_nodes.get_lock():
+            self.shared_nodes.value += self.nodes - self.reported_nodes
+            total = self.shared_nodes.value
+        self.reported_nodes = self.nodes
+        return total
+    # Devuelve los movimientos legales sin incluir movimientos que pondrían al jugador en jaque
+    def get_legal_moves_no_check(self, board):
+    # Descarta las jugadas a casillas que el rival puede alcanzar, usando máscaras de ataque en lugar de invertir el turno
+        return generate_safe_moves(board)
+    # Jugadas seguras de la raíz: con un CustomBoard se toman del índice de la posición, que la interfaz puede haber calculado ya
+    def root_moves(self, board):
+        if isinstance(board, CustomBoard):
+            return board.move_index().safe[:]
+        return self.get_legal_moves_no_check(board)
+    # Evalúa el tablero asignando valores a las piezas
+    def evaluate_board(self, board):
+    # Con un evaluador por lotes, una posición suelta se evalúa como un lote de una
+        if self.evaluator is not None:
+            return self.evaluator.evaluate([board])[0]
+    # CustomBoard y SearchPosition mantienen el material actualizado en cada push y pop, así que la evaluación es inmediata
+        if isinstance(board, (CustomBoard, SearchPosition)):
+            return board.material_balance()
+    # Inicializar la puntuación de la evaluación
+        evaluation = 0
+    # Iterar sobre todas las casillas del tablero
+        for square in chess.SQUARES:
+        # Obtener la pieza en la casilla actual
+            piece = board.piece_at(square)
+            if piece:
+            # Obtener el valor de la pieza según el tipo
+                value = PIECE_VALUES[piece.piece_type]
+            # Sumar o restar el valor dependiendo del color de la pieza
+                evaluation += value if piece.color == chess.WHITE else -value
+        return evaluation
+    # Implementación del algoritmo minimax con poda alfa-beta y tabla de transposición
+    def minimax(self, depth, board, is_maximizing, alpha, beta, ply=1):
+        self.nodes += 1
+    # Cada 1024 nodos se comprueba el reloj, la orden de parada y el total de nodos compartido; el límite de nodos propio se comprueba siempre
+        if self.nodes >= self.max_nodes or (not self.nodes & 1023 and self.limits_reached()):
+            raise SearchTimeout()
+    # Las posiciones de la tabla de finales se responden sin buscar, con su valor exacto
+        if self.tablebase is not None:
+            score = self.tablebase.probe(board)
+            if score is not None:
+                if self.search_stats is not None:
+                    self.search_stats.tablebase_hits += 1
+                return score
+    # Consulta la tabla de transposición: si la posición ya se buscó con profundidad suficiente se reutiliza su resultado
+        key = board.zobrist_key()
+        entry = self.transposition_table.probe(key)
+        tt_move = None
+        if entry is not None:
+            _, entry_depth, entry_score, entry_flag, tt_move, _ = entry
+            # Solo se reutilizan entradas de la misma profundidad: así el valor de cada posición no depende del orden
+            # de búsqueda y la búsqueda en paralelo devuelve la misma jugada que la búsqueda en serie
+            if entry_depth == depth:
+                if entry_flag == TT_LOWER:
+                    alpha = max(alpha, entry_score)
+                elif entry_flag == TT_UPPER:
+                    beta = min(beta, entry_score)
+                if entry_flag == TT_EXACT or alpha >= beta:
+                    if self.search_stats is not None:
+                        self.search_stats.tt_cutoffs += 1
+                    return entry_score
+        alpha_orig, beta_orig = alpha, beta
+    # Con estadísticas activas se mide por separado el tiempo de generación de jugadas y el de evaluación
+        stats = self.search_stats
+        if stats is not None:
+            started = time.perf_counter()
+    # Condición de parada: alcanza la profundidad máxima o el juego ha terminado
+        if depth == 0 or board.is_game_over():
+            if stats is not None:
+                evaluated = time.perf_counter()
+                score = self.evaluate_board(board)
+                stats.movegen_seconds += evaluated - started
+                stats.eval_seconds += time.perf_counter() - evaluated
+            else:
+                score = self.evaluate_board(board)
+            self.transposition_table.store(key, depth, score, TT_EXACT, None)
+            return score
+    # Obtener todos los movimientos legales sin poner en jaque al oponente
+        legal_moves = list(self.get_legal_moves_no_check(board))
+    # Ordena las jugadas (mejor jugada de la tabla, capturas, asesinas e historial) para provocar podas antes
+        legal_moves = self.order_moves(board, legal_moves, tt_move, ply)
+        best_move = None
+        if stats is not None:
+            stats.movegen_seconds += time.perf_counter() - started
+            expanded = stats.expanded_by_ply.setdefault(ply, [0, 0])
+            expanded[0] += 1
+            expanded[1] += len(legal_moves)
+    # Con un evaluador por lotes, en los nodos frontera se evalúan todas las hojas de una vez antes de recorrerlas
+        leaf_scores = self.evaluate_frontier(board, legal_moves) if depth == 1 and self.evaluator is not None else None
+
+        if is_maximizing:
+        # Inicializar el valor mínimo para el jugador maximizador
+            min_eval = float('inf')
+            for index, move in enumerate(legal_moves):
+                if leaf_scores is not None:
+                    eval = leaf_scores[index]
+                else:
+                # Realizar el movimiento
+                    board.push(move)
+                # Llamar recursivamente a minimax para el siguiente nivel (minimizando)
+                    eval = self.minimax(depth - 1, board, False, alpha, beta, ply + 1)
+                # Deshacer el movimiento
+                    board.pop()
+            # Actualizar el valor mínimo
+                if eval < min_eval:
+                    min_eval, best_move = eval, move
+            # Actualizar el valor beta para la poda alfa-beta
+                beta = min(beta, eval)
+            # Realizar la poda alfa-beta si es posible
+                if beta <= alpha:
+                    self.record_cutoff(board, move, depth, ply, index)
+                    break
+            score = min_eval
+        else:
+        # Inicializar el valor máximo para el jugador minimizador
+            max_eval = float('-inf')
+            for index, move in enumerate(legal_moves):
+                if leaf_scores is not None:
+                    eval = leaf_scores[index]
+                else:
+                # Realizar el movimiento
+                    board.push(move)
+                # Llamar recursivamente a minimax para el siguiente nivel (maximizando)
+                    eval = self.minimax(depth - 1, board, True, alpha, beta, ply + 1)
+                # Deshacer el movimiento
+                    board.pop()
+            # Actualizar el valor máximo
+                if eval > max_eval:
+                    max_eval, best_move = eval, move
+            # Actualizar el valor alfa para la poda alfa-beta
+                alpha = max(alpha, eval)
+            # Realizar la poda alfa-beta si es posible
+                if beta <= alpha:
+                    self.record_cutoff(board, move, depth, ply, index)
+                    break
+            score = max_eval
+    # Guarda el resultado con su tipo de cota según la ventana alfa-beta original
+        if score <= alpha_orig:
+            flag = TT_UPPER
+        elif score >= beta_orig:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        self.transposition_table.store(key, depth, score, flag, best_move)
+        return score
+    # Valores de las hojas de un nodo frontera (profundidad 1), en el orden de moves. Cada hija cuenta como nodo y pasa
+    # por el reloj, la tabla de finales y la tabla de transposición igual que en minimax; las que quedan se evalúan
+    # en un solo lote. Se evalúan todas las hijas, sin poda, y el bucle de minimax aplica después la misma poda alfa-beta
+    def evaluate_frontier(self, board, moves):
+        scores, pending, keys, rows = [None] * len(moves), [], [], []
+        for index, move in enumerate(moves):
+            self.nodes += 1
+            if self.nodes >= self.max_nodes or (not self.nodes & 1023 and self.limits_reached()):
+                raise SearchTimeout()
+            board.push(move)
+            score = self.tablebase.probe(board) if self.tablebase is not None else None
+            if score is not None:
+                if self.search_stats is not None:
+                    self.search_stats.tablebase_hits += 1
+            else:
+                key = board.zobrist_key()
+                entry = self.transposition_table.probe(key)
+                # Las entradas de profundidad 0 son siempre exactas
+                if entry is not None and entry[1] == 0:
+                    score = entry[2]
+                    if self.search_stats is not None:
+                        self.search_stats.tt_cutoffs += 1
+                else:
+                    pending.append(index)
+                    keys.append(key)
+                    rows.append(self.evaluator.encode(board))
+            board.pop()
+            scores[index] = score
+        if rows:
+            started = time.perf_counter()
+            values = self.evaluator.evaluate_encoded(rows)
+            if self.search_stats is not None:
+                self.search_stats.eval_seconds += time.perf_counter() - started
+            for index, key, score in zip(pending, keys, values):
+                self.transposition_table.store(key, 0, score, TT_EXACT, None)
+                scores[index] = score
+        return scores
+    # Ordena las jugadas: primero la de la variante principal, luego capturas por MVV-LVA, luego asesinas y por último el historial
+    def order_moves(self, board, moves, tt_move, ply):
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        def move_score(move):
+            if move == tt_move:
+                return 1000000
+            victim = board.piece_type_at(move.to_square)
+            if victim:
+            # Víctima más valiosa primero y, a igualdad, el atacante menos valioso
+                return 100000 + 10 * PIECE_VALUES[victim] - PIECE_VALUES[board.piece_type_at(move.from_square)]
+            if move in killers:
+                return 90000
+            return min(self.history.get((move.from_square, move.to_square), 0), 89999)
+        # sorted es estable: a igual puntuación se conserva el orden del generador
+        return sorted(moves, key=move_score, reverse=True)
+    # Guarda una jugada tranquila que provocó un corte como asesina de su ply y suma su peso en el historial
+    def record_cutoff(self, board, move, depth, ply, index=0):
+        if self.search_stats is not None:
+            self.search_stats.cutoffs_by_ply[ply] = self.search_stats.cutoffs_by_ply.get(ply, 0) + 1
+            self.search_stats.cutoffs_by_index[index] = self.search_stats.cutoffs_by_index.get(index, 0) + 1
+        if board.is_capture(move):
+            return
+        if ply < len(self.killers) and self.killers[ply][0] != move:
+            self.killers[ply][1] = self.killers[ply][0]
+            self.killers[ply][0] = move
+        key = (move.from_square, move.to_square)
+        self.history[key] = self.history.get(key, 0) + depth * depth
+    # Busca todas las jugadas de la raíz a una profundidad fija y devuelve la mejor
+    def search_root(self, board, color, depth, legal_moves):
+        best_move = None
+    # Inicializar el mejor valor como infinito negativo para el jugador negro y como infinito positivo para el jugador blanco
+        best_value = float('inf') if color == chess.WHITE else float('-inf')
+    # Iterar sobre todos los movimientos legales disponibles
+        for move in legal_moves:
+        # Realizar el movimiento
+            board.push(move)
+        # Llamar a minimax con la ventana acotada por el mejor valor encontrado: una jugada que no lo mejora se poda antes
+            if color == chess.WHITE:
+                board_value = self.minimax(depth - 1, board, True, float('-inf'), best_value)
+            else:
+                board_value = self.minimax(depth - 1, board, False, best_value, float('inf'))
+        # Deshacer el movimiento
+            board.pop()
+        # Actualizar el mejor movimiento si el valor del tablero es mejor que el mejor valor actual
+            if (color == chess.WHITE and board_value < best_value) or (color == chess.BLACK and board_value > best_value):
+                best_value = board_value
+                best_move = move
+        return best_move
+    # Reparte las jugadas de la raíz entre los procesos. Cada proceso busca una jugada con la ventana acotada por
+    # la mejor cota compartida (más uno, para no perder empates) y se elige, en el orden de la raíz, la primera
+    # jugada con el mejor valor: es la misma que elige search_root
+    def search_root_parallel(self, board, color, depth, legal_moves):
+        self.shared_bound.value = float('inf') if color == chess.WHITE else float('-inf')
+        fen, time_left_ms = board.fen(), (self.deadline - time.perf_counter()) * 1000
+        # El límite de nodos es el de toda la búsqueda: los procesos suman sus nodos al contador compartido, que parte de los
+        # de las iteraciones anteriores, y cada uno se detiene cuando el total llega a max_nodes. Como cada proceso suma sus nodos
+        # cada 1024, el total puede pasar del límite en menos de 1024 nodos por proceso, pero la iteración ya no se acepta
+        self.shared_nodes.value = self.nodes
+        tasks = [(fen, move.uci(), color, depth, self.search_id, time_left_ms, self.max_nodes) for move in legal_moves]
+        results = self.pool.starmap(_search_root_move, tasks, chunksize=1)
+        self.nodes += sum(nodes for _, nodes in results)
+        if self.nodes >= self.max_nodes or any(value is None for value, _ in results):
+            raise SearchTimeout()
+        best_move = None
+        best_value = float('inf') if color == chess.WHITE else float('-inf')
+        for move, (board_value, _) in zip(legal_moves, results):
+            if (color == chess.WHITE and board_value < best_value) or (color == chess.BLACK and board_value > best_value):
+                best_value = board_value
+                best_move = move
+        return best_move
+    # Obtiene el mejor movimiento con profundización iterativa dentro del tiempo y los nodos disponibles
+    # progress, si se indica, se llama con (profundidad, mejor jugada, nodos) al terminar cada iteración
+    # search_moves, si se indica, limita la raíz a esas jugadas (las que no sean seguras se ignoran)
+    # ponder marca la búsqueda como hecha durante el turno del rival, sobre la jugada que se espera de él
+    def get_best_move(self, board, color, time_budget_ms=AI_TIME_BUDGET_MS, max_nodes=AI_MAX_NODES, max_depth=AI_MAX_DEPTH, progress=None, search_moves=None, ponder=False):
+        stats = SearchStats() if self.collect_stats or self.log_stats else None
+        self.search_stats = stats
+    # Si se pidió un perfil, esta búsqueda (y solo esta) se ejecuta bajo cProfile
+        profiler = None
+        if self.profile_path is not None:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        start = time.perf_counter()
+        # Las posiciones del libro de aperturas se responden sin buscar
+        book_move = self.book.choose(board, self.book_rng) if self.book is not None and color == board.turn and search_moves is None else None
+        try:
+            if book_move is not None:
+                self.nodes, self.search_depth = 0, 0
+                best_move = book_move
+            else:
+                best_move = self.iterative_deepening(board, color, time_budget_ms, max_nodes, max_depth, progress, search_moves)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self.last_profile = pstats.Stats(profiler)
+                self.last_profile.dump_stats(self.profile_path)
+                self.profile_path = None
+            self.search_stats = None
+        # Las estadísticas se publican en self.stats solo cuando la búsqueda termina
+        if stats is not None:
+            stats.nodes, stats.tt_hits, stats.seconds = self.nodes, self.transposition_table.hits, time.perf_counter() - start
+            stats.depth, stats.best_move, stats.from_book, stats.ponder = self.search_depth, best_move, book_move is not None, ponder
+            stats.pv = self.principal_variation(board, best_move, self.search_depth)
+            if self.log_stats:
+                logger.info(json.dumps(stats.as_dict()))
+            self.stats = stats
+        return best_move
+    # Perfila la siguiente búsqueda con cProfile y guarda el resultado en path (se puede abrir con pstats o snakeviz)
+    def profile_next_search(self, path):
+        self.profile_path = path
+    # Variante principal: desde la raíz se sigue en la tabla de transposición la mejor jugada de cada posición
+    def principal_variation(self, board, move, length):
+        pv, seen = [], set()
+        while move is not None and len(pv) < length and board.is_legal(move):
+            pv.append(move)
+            board.push(move)
+            key = board.zobrist_key()
+            if key in seen:
+                break
+            seen.add(key)
+            entry = self.transposition_table.slots[key & self.transposition_table.mask]
+            move = entry[4] if entry is not None and entry[0] == key else None
+        for _ in pv:
+            board.pop()
+        return pv
+    # Profundización iterativa: busca a profundidad 1, 2, 3... hasta agotar los límites
+    def iterative_deepening(self, board, color, time_budget_ms, max_nodes, max_depth, progress, search_moves=None):
+        start = time.perf_counter()
+        self.search_depth = 0
+        self.search_id += 1
+        self.transposition_table.new_search()
+        self.begin_search(time_budget_ms, max_nodes, max_depth)
+        legal_moves = self.root_moves(board)
+        if search_moves is not None:
+            legal_moves = [move for move in legal_moves if move in search_moves]
+    # Si no hay movimientos legales, retorna None; si solo hay uno no hace falta buscar
+        if len(legal_moves) <= 1:
+            return legal_moves[0] if legal_moves else None
+        legal_moves = self.order_moves(board, legal_moves, None, 0)
+        best_move = legal_moves[0]
+    # En una posición de la tabla de finales basta una iteración: cada hijo se responde con su valor exacto
+        if self.tablebase is not None and self.tablebase.probe(board) is not None:
+            max_depth = 1
+    # La búsqueda en serie trabaja sobre una SearchPosition; el tablero de la partida no se toca
+        position = SearchPosition(board)
+        for depth in range(1, max_depth + 1):
+            try:
+                if self.pool is not None and depth >= PARALLEL_MIN_DEPTH:
+                    move = self.search_root_parallel(board, color, depth, legal_moves)
+                else:
+                    move = self.search_root(position, color, depth, legal_moves)
+            except SearchTimeout:
+            # La búsqueda interrumpida deja jugadas en la posición, que ya no se usa: vale la última iteración completa
+                break
+            best_move = move
+            self.search_depth = depth
+            if self.search_stats is not None:
+                self.search_stats.iterations.append((depth, self.nodes, time.perf_counter() - start, move))
+            if progress is not None:
+                progress(depth, best_move, self.nodes)
+        # La mejor jugada de esta iteración se busca primero en la siguiente
+            legal_moves.remove(move)
+            legal_moves.insert(0, move)
+        self.deadline, self.max_nodes = float('inf'), float('inf')
+        return best_move
+# Estado de cada proceso del motor en paralelo: su propio motor, la cota compartida y la última búsqueda atendida
+_worker_state = {}
+
+def _init_search_worker(shared_bound, shared_nodes, stop_event, tt_size_mb, tablebase_path, evaluator):
+    engine = SearchEngine(tt_size_mb, tablebase_path=tablebase_path, book_path=None, evaluator=evaluator)
+    engine.stop_event, engine.shared_nodes = stop_event, shared_nodes
+    _worker_state.update(engine=engine, bound=shared_bound, search_id=None)
+
+# Busca una jugada de la raíz en un proceso del motor; devuelve (valor, nodos) o (None, nodos) si se agotó el tiempo
+def _search_root_move(fen, move_uci, color, depth, search_id, time_left_ms, max_nodes):
+    engine, bound = _worker_state["engine"], _worker_state["bound"]
+    # Si otras jugadas ya agotaron los nodos de la búsqueda, esta ni empieza
+    if engine.shared_nodes.value >= max_nodes:
+        return None, 0
+    if _worker_state["search_id"] != search_id:
+        _worker_state["search_id"] = search_id
+        engine.transposition_table.new_search()
+    engine.begin_search(time_left_ms, max_nodes, depth)
+    engine.reported_nodes = 0
+    board = SearchPosition(CustomBoard(fen))
+    board.push(chess.Move.from_uci(move_uci))
+    current = bound.value
+    try:
+        if color == chess.WHITE:
+            value = engine.minimax(depth - 1, board, True, float('-inf'), current + 1)
+        else:
+            value = engine.minimax(depth - 1, board, False, current - 1, float('inf'))
+    except SearchTimeout:
+        return None, engine.nodes
+    # Una jugada que termina cuando el total ya pasó del límite cuenta como agotada, igual que en la búsqueda en serie
+    if engine.report_nodes() >= max_nodes:
+        return None, engine.nodes
+    # Publica el valor si mejora la cota compartida
+    with bound.get_lock():
+        if (color == chess.WHITE and value < bound.value) or (color == chess.BLACK and value > bound.value):
+            bound.value = value
+    return value, engine.nodes
+
+# Mide la aceleración y la eficiencia de la búsqueda en paralelo a profundidad fija para distintos números de procesos
+def measure_parallel_speedup(fen, depth, worker_counts=(1, 2, 4, 8)):
+    rows = []
+    for workers in worker_counts:
+        engine = SearchEngine(workers=workers, book_path=None)
+        board = CustomBoard(fen)
+        start = time.perf_counter()
+        move = engine.get_best_move(board, board.turn, time_budget_ms=float('inf'), max_nodes=float('inf'), max_depth=depth)
+        elapsed = time.perf_counter() - start
+        engine.close()
+        rows.append({"workers": workers, "move": move.uci() if move else None, "seconds": elapsed, "nodes": engine.nodes})
+    for row in rows:
+        row["speedup"] = rows[0]["seconds"] / row["seconds"]
+        row["efficiency"] = row["speedup"] / row["workers"]
+    return rows
+
+# Configura el tablero con una disposición inicial personalizada
+def setup_custom_board():
+    board = CustomBoard(fen=None)
+    # Define las piezas personalizadas y las piezas estándar para el tablero inicial y Usar CustomKing en lugar de chess.KING
+    pieces = [chess.ROOK, chess.KNIGHT, chess.BISHOP, chess.QUEEN, CustomKing, chess.BISHOP, chess.KNIGHT, chess.ROOK]
+     # Coloca las piezas en sus posiciones iniciales
+
+    for i, piece in enumerate(pieces):
+        if piece == CustomKing:
+          # Coloca el rey personalizado en las posiciones iniciales de blancas y negras
+            board.set_piece_at(chess.square(i, 0), CustomKing(chess.WHITE))
+            board.set_piece_at(chess.square(i, 7), CustomKing(chess.BLACK))
+        else:
+         # Coloca las piezas estándar  en las posiciones iniciales
+
+            board.set_piece_at(chess.square(i, 0), chess.Piece(piece, chess.WHITE))
+            board.set_piece_at(chess.square(i, 7), chess.Piece(piece, chess.BLACK))
+        # Coloca los peones en las filas de peones
+
+    for i in range(8):
+        board.set_piece_at(chess.square(i, 1), chess.Piece(chess.PAWN, chess.WHITE))
+        board.set_piece_at(chess.square(i, 6), chess.Piece(chess.PAWN, chess.BLACK))
+    return board
+
+# Verifica si todas las piezas (excepto los reyes) han sido capturadas
+def is_all_pieces_captured(board):
+    if isinstance(board, CustomBoard):
+        return board.total_pieces(include_kings=False) == 0
+    return not any(piece for piece in board.piece_map().values() if piece.piece_type != chess.KING)
+
+# Nombre de una pieza como lo usan las imágenes y los contadores de la partida, por ejemplo peon_blanco
+def piece_name(piece):
+    color = 'blanco' if piece.color == chess.WHITE else 'negro'
+    piece_type = {chess.QUEEN: 'reina', chess.ROOK: 'torre', chess.BISHOP: 'alfil', chess.KNIGHT: 'caballo', chess.PAWN: 'peon', chess.KING: 'rey'}[piece.piece_type]
+    return f"{piece_type}_{color}"
+
+# Aplica una jugada y la cuenta como la ventana: en move_counter la pieza que ha movido y en turn_counter el color que movió
+def push_counted(board, move, move_counter, turn_counter):
+    turn = "Blanco" if board.turn == chess.WHITE else "Negro"
+    board.push(move)
+    key = piece_name(board.piece_at(move.to_square))
+    move_counter[key] = move_counter.get(key, 0) + 1
+    turn_counter[turn] = turn_counter.get(turn, 0) + 1
+
+# Determina el ganador cuando solo quedan dos piezas en el tablero
+def Determine_winner(board, move_counter):
+    # Contadores de piezas capturadas por cada jugador
+    white_captured = move_counter.get('peon_negro', 0) + move_counter.get('alfil_negro', 0) + move_counter.get('caballo_negro', 0) + move_counter.get('torre_negro', 0) + move_counter.get('reina_negro', 0)
+    black_captured = move_counter.get('peon_blanco', 0) + move_counter.get('alfil_blanco', 0) + move_counter.get('caballo_blanco', 0) + move_counter.get('torre_blanco', 0) + move_counter.get('reina_blanco', 0)
+    total_pieces = board.total_pieces() if isinstance(board, CustomBoard) else len(board.piece_map())
+
+    # Si solo queda una pieza en el tablero
+    if total_pieces == 2:
+        # Determina al ganador según la cantidad de piezas capturadas
+        if white_captured < black_captured:
+            return "Blancas"
+        elif black_captured < white_captured:
+            return "Negras"
+        else:
+            return "Empate"
+    else:
+        return None
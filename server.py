@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import chess
+from motor import AI_TIME_BUDGET_MS, Determine_winner, SearchEngine, is_all_pieces_captured, push_counted, setup_custom_board
+
+# Servidor de partidas humano contra IA para muchas partidas a la vez, sobre TCP en localhost.
+# Cada conexión es una partida. Los mensajes son objetos JSON, uno por línea:
+#   cliente -> {"type": "new", "color": "white"|"black", "game_ms": 60000, "move_ms": 1500}   color del humano
+#              {"type": "move", "move": "e2e4"}
+#              {"type": "quit"}
+#   servidor -> {"type": "started", "fen": ..., "workers": N}
+#               {"type": "move", "move": ..., "fen": ..., "think_ms": ..., "wait_ms": ..., "clock_ms": ...}   jugada de la IA
+#               {"type": "over", "winner": ..., "termination": ..., "move_counter": {...}, "turn_counter": {...}}
+#               {"type": "error", "message": ...}
+# Las búsquedas se hacen en un grupo fijo de procesos del motor compartido por todas las partidas:
+#   - cada partida tiene como mucho una búsqueda pendiente y las búsquedas esperan en una cola FIFO, así que el reparto
+#     entre partidas es por turnos: ninguna partida vuelve a buscar hasta que las que esperaban antes han tenido su turno;
+#   - la cola tiene un tamaño máximo: cuando está llena, las partidas esperan para entrar en orden de llegada; como cada
+#     partida tiene como mucho una búsqueda pendiente, el trabajo acumulado está acotado por --max-games, y por encima
+#     de ese número las conexiones nuevas se rechazan con un error;
+#   - si el cliente se desconecta, su búsqueda se cancela: si aún estaba en la cola no llega a ocupar un proceso;
+#   - cada partida tiene un reloj para la IA (game_ms): cada jugada piensa como mucho move_ms y como mucho la parte del
+#     reloj que le toca si quedaran MOVES_TO_GO jugadas. El tiempo en cola no se descuenta del reloj de la partida.
+
+HOST = "127.0.0.1"
+PORT = 8765
+# Reloj de la IA por partida y tiempo máximo por jugada, si el cliente no los indica
+GAME_TIME_MS = 60000
+MOVE_TIME_MS = AI_TIME_BUDGET_MS
+# Jugadas entre las que se reparte el reloj restante, como en uci.py
+MOVES_TO_GO = 30
+# Tiempo mínimo de una jugada aunque el reloj se haya agotado
+MIN_MOVE_MS = 50
+# Partidas simultáneas por defecto y búsquedas que pueden esperar en la cola por cada proceso del motor
+MAX_GAMES = 256
+QUEUE_PER_WORKER = 4
+
+
+# Motor de cada proceso del grupo; su tabla de transposición se comparte entre las partidas que atiende
+_worker_engine = None
+
+def _init_engine_worker():
+    global _worker_engine
+    _worker_engine = SearchEngine()
+
+
+# Búsqueda en un proceso del grupo. La partida llega como lista de jugadas desde la posición inicial, para que el
+# proceso tenga el historial de repeticiones; devuelve la jugada, el tiempo de búsqueda y los nodos
+def _search_move(moves, time_budget_ms):
+    board = setup_custom_board()
+    for uci in moves:
+        board.push(chess.Move.from_uci(uci))
+    start = time.perf_counter()
+    move = _worker_engine.get_best_move(board, board.turn, time_budget_ms=time_budget_ms)
+    return move.uci() if move else None, (time.perf_counter() - start) * 1000, _worker_engine.nodes
+
+
+# Reparte las búsquedas de todas las partidas entre los procesos del motor.
+# Hay tantas tareas de reparto como procesos, así que el grupo nunca tiene trabajo acumulado: lo que espera está en la
+# cola de este objeto, que decide el orden
+class EngineScheduler:
+    def __init__(self, workers, queue_size):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(workers, initializer=_init_engine_worker)
+        self.queue = asyncio.Queue(queue_size)
+        self.dispatchers = []
+
+    # Arranca los procesos antes de abrir el puerto, para que no hereden el socket del servidor
+    async def start(self):
+        await asyncio.get_running_loop().run_in_executor(self.executor, os.getpid)
+        self.dispatchers = [asyncio.create_task(self.dispatch()) for _ in range(self.workers)]
+
+    async def close(self):
+        for task in self.dispatchers:
+            task.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+        self.executor.shutdown(cancel_futures=True)
+
+    async def dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            moves, time_budget_ms, queued, future = await self.queue.get()
+            # Si la partida se cerró mientras esperaba, su búsqueda se descarta sin ocupar un proceso
+            if future.done():
+                continue
+            wait_ms = (time.perf_counter() - queued) * 1000
+            try:
+                move, think_ms, nodes = await loop.run_in_executor(self.executor, _search_move, moves, time_budget_ms)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result((move, think_ms, wait_ms, nodes))
+
+    # Pide una jugada para la partida y espera el resultado: (jugada, ms de búsqueda, ms en cola, nodos)
+    async def search(self, moves, time_budget_ms):
+        future = asyncio.get_running_loop().create_future()
+        # Con la cola llena la partida espera aquí, sin leer más de su conexión
+        await self.queue.put((moves, time_budget_ms, time.perf_counter(), future))
+        return await future
+
+
+# Estado de una partida: tablero, contadores como los de la ventana y reloj de la IA
+class GameSession:
+    def __init__(self, human_color, game_ms, move_ms):
+        self.board = setup_custom_board()
+        self.human_color = human_color
+        self.clock_ms = game_ms
+        self.move_ms = move_ms
+        self.move_counter, self.turn_counter = {}, {}
+        self.termination = None
+
+    def play(self, move):
+        push_counted(self.board, move, self.move_counter, self.turn_counter)
+
+    def moves(self):
+        return [move.uci() for move in self.board.move_stack]
+
+    # Tiempo de la próxima jugada de la IA
+    def time_budget_ms(self):
+        return max(MIN_MOVE_MS, min(self.move_ms, self.clock_ms / MOVES_TO_GO))
+
+    def is_over(self):
+        return self.termination is not None or self.board.is_game_over() or is_all_pieces_captured(self.board)
+
+    def result(self):
+        return {"type": "over", "winner": Determine_winner(self.board, self.move_counter), "termination": self.termination or "fin",
+                "fen": self.board.fen(), "move_counter": self.move_counter, "turn_counter": self.turn_counter}
+
+
+class GameServer:
+    def __init__(self, scheduler, max_games):
+        self.scheduler = scheduler
+        self.max_games = max_games
+        self.games = 0  # Conexiones abiertas
+        self.finished = 0  # Partidas terminadas desde que arrancó el servidor
+
+    async def send(self, writer, message):
+        writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8"))
+        await writer.drain()
+
+    async def handle(self, reader, writer):
+        if self.games >= self.max_games:
+            await self.send(writer, {"type": "error", "message": "servidor lleno"})
+            writer.close()
+            return
+        self.games += 1
+        try:
+            await self.serve(reader, writer)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.games -= 1
+            writer.close()
+
+    # Lee los mensajes del cliente. La jugada de la IA se pide en una tarea aparte para seguir leyendo mientras piensa:
+    # así una desconexión se detecta enseguida y cancela la búsqueda pendiente
+    async def serve(self, reader, writer):
+        session, thinking = None, None
+        try:
+            async for line in reader:
+                try:
+                    message = json.loads(line)
+                    kind = message["type"]
+                except (ValueError, KeyError, TypeError):
+                    await self.send(writer, {"type": "error", "message": "mensaje no válido"})
+                    continue
+                if kind == "quit":
+                    break
+                elif kind == "new":
+                    if thinking is not None:
+                        thinking.cancel()
+                    human_color = chess.BLACK if message.get("color") == "black" else chess.WHITE
+                    session = GameSession(human_color, message.get("game_ms", GAME_TIME_MS), message.get("move_ms", MOVE_TIME_MS))
+                    await self.send(writer, {"type": "started", "fen": session.board.fen(), "workers": self.scheduler.workers})
+                    if session.board.turn != human_color:
+                        thinking = asyncio.create_task(self.ai_move(session, writer))
+                elif kind == "move":
+                    # Mientras la IA piensa el turno es suyo, así que también se rechazan las jugadas enviadas antes de tiempo
+                    if session is None or session.is_over() or session.board.turn != session.human_color:
+                        await self.send(writer, {"type": "error", "message": "no es tu turno"})
+                        continue
+                    try:
+                        move = chess.Move.from_uci(message["move"])
+                    except (KeyError, ValueError):
+                        move = None
+                    # Como en la ventana, el humano puede hacer cualquier jugada legal
+                    if move is None or move not in session.board.move_index():
+                        await self.send(writer, {"type": "error", "message": "jugada ilegal"})
+                        continue
+                    session.play(move)
+                    if session.is_over():
+                        await self.game_over(session, writer)
+                    else:
+                        thinking = asyncio.create_task(self.ai_move(session, writer))
+                else:
+                    await self.send(writer, {"type": "error", "message": f"tipo desconocido {kind!r}"})
+        finally:
+            if thinking is not None:
+                thinking.cancel()
+
+    async def ai_move(self, session, writer):
+        try:
+            uci, think_ms, wait_ms, nodes = await self.scheduler.search(session.moves(), session.time_budget_ms())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Un proceso del motor que falla termina la partida, no el servidor
+            session.termination = "error del motor"
+            await self.send(writer, {"type": "error", "message": f"error del motor: {e!r}"})
+            return
+        session.clock_ms -= think_ms
+        # El motor solo juega jugadas seguras: si no le queda ninguna, la partida termina
+        try:
+            if uci is None:
+                session.termination = "sin jugadas seguras"
+            else:
+                session.play(chess.Move.from_uci(uci))
+                await self.send(writer, {"type": "move", "move": uci, "fen": session.board.fen(), "think_ms": round(think_ms, 1),
+                                         "wait_ms": round(wait_ms, 1), "nodes": nodes, "clock_ms": round(session.clock_ms)})
+            if session.is_over():
+                await self.game_over(session, writer)
+        except ConnectionError:
+            pass
+
+    async def game_over(self, session, writer):
+        self.finished += 1
+        await self.send(writer, session.result())
+
+
+async def run_server(host, port, workers, max_games):
+    scheduler = EngineScheduler(workers, workers * QUEUE_PER_WORKER)
+    await scheduler.start()
+    game_server = GameServer(scheduler, max_games)
+    server = await asyncio.start_server(game_server.handle, host, port)
+    print(f"Escuchando en {host}:{port} con {workers} procesos del motor", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await scheduler.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de partidas humano contra IA con un grupo compartido de procesos del motor")
+    parser.add_argument("--host", default=HOST, help="dirección en la que escuchar")
+    parser.add_argument("--port", type=int, default=PORT, help="puerto TCP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="procesos del motor compartidos por todas las partidas")
+    parser.add_argument("--max-games", type=int, default=MAX_GAMES, help="partidas simultáneas admitidas")
+    args = parser.parse_args()
+    # SIGTERM cierra el servidor igual que Ctrl+C, terminando también los procesos del motor
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(run_server(args.host, args.port, args.workers, args.max_games))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
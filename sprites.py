@@ -0,0 +1,100 @@
+import hashlib
+import os
+from PIL import Image, ImageTk
+
+# Carpeta de las imágenes de las piezas, relativa a este módulo para que el programa funcione desde cualquier directorio
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "imágenes")
+# Carpeta donde se guardan los atlas ya redimensionados, uno por tamaño de casilla
+CACHE_DIR = os.path.join(IMAGES_DIR, "cache")
+# Orden de las piezas dentro del atlas: cada una ocupa una franja de size x size píxeles
+PIECE_NAMES = ["reina_blanco", "torre_blanco", "alfil_blanco", "caballo_blanco", "peon_blanco", "rey_blanco",
+               "reina_negro", "torre_negro", "alfil_negro", "caballo_negro", "peon_negro", "rey_negro"]
+
+
+# Atlas de las 12 piezas ya redimensionadas a un tamaño de casilla.
+# Se guarda en disco como píxeles RGBA sin comprimir, así que se carga con una sola lectura y sin volver a redimensionar.
+# El nombre del archivo incluye el tamaño y una huella de las fechas de modificación de los PNG: si alguno cambia, el atlas se regenera.
+# Las imágenes de Tk se crean de forma perezosa, la primera vez que se dibuja cada pieza.
+class SpriteAtlas:
+    def __init__(self, size, images_dir=IMAGES_DIR, cache_dir=CACHE_DIR):
+        self.size = size
+        self.images_dir = images_dir
+        self.cache_dir = cache_dir
+        self.atlas = None  # Imagen PIL con todas las piezas; se carga en el primer get
+        self.missing = set()  # Piezas cuyo PNG no se pudo cargar
+        self.images = {}  # Imágenes de Tk ya creadas, por nombre de pieza
+
+    def source_path(self, name):
+        return os.path.join(self.images_dir, f"{name}.png")
+
+    # Ruta del atlas para este tamaño y estas fechas de modificación (las piezas que falten cuentan como fecha 0)
+    def cache_path(self):
+        stamps = []
+        for name in PIECE_NAMES:
+            try:
+                stamps.append(f"{name}:{os.stat(self.source_path(name)).st_mtime_ns}")
+            except OSError:
+                stamps.append(f"{name}:0")
+        key = hashlib.sha1("|".join(stamps).encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"piezas_{self.size}_{key}.rgba")
+
+    # Devuelve la imagen de Tk de una pieza, o None si su archivo no existe
+    def get(self, name):
+        if name in self.images:
+            return self.images[name]
+        if self.atlas is None:
+            self.atlas = self.load()
+        if name not in PIECE_NAMES or name in self.missing:
+            return None
+        x = PIECE_NAMES.index(name) * self.size
+        image = ImageTk.PhotoImage(self.atlas.crop((x, 0, x + self.size, self.size)))
+        self.images[name] = image
+        return image
+
+    # Lee el atlas del disco o, si no existe o está desactualizado, lo construye a partir de los PNG
+    def load(self):
+        path = self.cache_path()
+        width, height = self.size * len(PIECE_NAMES), self.size
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            if len(data) == width * height * 4:
+                self.missing = {name for name in PIECE_NAMES if not os.path.exists(self.source_path(name))}
+                return Image.frombuffer("RGBA", (width, height), data, "raw", "RGBA", 0, 1)
+        except OSError:
+            pass
+        atlas = self.build()
+        self.save(atlas, path)
+        return atlas
+
+    def build(self):
+        atlas = Image.new("RGBA", (self.size * len(PIECE_NAMES), self.size))
+        self.missing = set()
+        for index, name in enumerate(PIECE_NAMES):
+            filename = self.source_path(name)
+            try:
+                with Image.open(filename) as image:
+                    atlas.paste(image.convert("RGBA").resize((self.size, self.size)), (index * self.size, 0))
+            except FileNotFoundError:
+                print(f"¡Error! No se encontró el archivo {filename}.")
+                self.missing.add(name)
+            except Exception as e:
+                print(f"¡Error al cargar {filename}: {str(e)}")
+                self.missing.add(name)
+        return atlas
+
+    # Escribe el atlas de forma atómica y borra los de este mismo tamaño que hayan quedado viejos.
+    # Si la carpeta no se puede escribir, el atlas solo se usa en memoria
+    def save(self, atlas, path):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            temp = f"{path}.{os.getpid()}.tmp"
+            with open(temp, "wb") as file:
+                file.write(atlas.tobytes())
+            os.replace(temp, path)
+            prefix = f"piezas_{self.size}_"
+            for entry in os.listdir(self.cache_dir):
+                if entry.startswith(prefix) and entry.endswith(".rgba") and os.path.join(self.cache_dir, entry) != path:
+                    os.remove(os.path.join(self.cache_dir, entry))
+        except OSError as e:
+            print(f"No se pudo guardar el atlas de piezas en {path}: {e}")
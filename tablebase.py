@@ -0,0 +1,392 @@
+import argparse
+import itertools
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+import chess
+from motor import (PIECE_VALUES, SIGNATURE_LETTERS, TABLEBASE_PATH, SearchPosition, Tablebase, ZOBRIST_PIECES,
+                   decode_tablebase_value, encode_tablebase_value, generate_safe_moves, material_signature, tablebase_index)
+
+# Generador de la tabla de finales por análisis retrógrado.
+# Para cada clase de material (por ejemplo KRvK) se recorren todas las posiciones legales con cada bando al turno y se
+# calcula el valor exacto de minimax sin límite de profundidad, con las reglas que usa el motor:
+#   - los dos bandos juegan las jugadas seguras de generate_safe_moves;
+#   - la partida acaba con board.is_game_over() (sin reyes ni piezas que capturar, material insuficiente, mate o ahogado)
+#     y vale el material de blancas menos negras;
+#   - el bando que no tiene jugadas seguras vale -infinito si son blancas y +infinito si son negras;
+#   - si nadie fuerza una captura, coronación o final, la partida sigue sin cambiar de material y vale el material actual.
+# Las blancas maximizan y las negras minimizan, como dentro de minimax. Las capturas y coronaciones llevan a clases con menos
+# piezas o menos peones, que se resuelven antes. La distancia es el número de jugadas (plies) hasta esa conversión.
+# Las clases con peones de los dos bandos quedan fuera: la captura al paso no cabe en el índice.
+# La memoria es de unos 13 bytes por índice de la clase (2 * 64**piezas índices): unos 3.5 MB con 3 piezas y unos 440 MB
+# con 4. El tiempo crece en la misma proporción, así que las clases de 4 piezas (--class) tardan horas.
+
+LETTER_TYPES = {"K": chess.KING, **{letter: piece_type for piece_type, letter in SIGNATURE_LETTERS}}
+
+
+# Orden de las piezas de una firma: rey blanco, rey negro y después las demás piezas blancas y negras en el orden de la firma
+def signature_layout(signature):
+    white, black = signature.upper().split("V")
+    if not white.startswith("K") or not black.startswith("K"):
+        raise ValueError(f"firma de material no válida: {signature}")
+    layout = [(chess.KING, chess.WHITE), (chess.KING, chess.BLACK)]
+    layout += [(LETTER_TYPES[letter], chess.WHITE) for letter in white[1:]]
+    layout += [(LETTER_TYPES[letter], chess.BLACK) for letter in black[1:]]
+    return layout
+
+
+def layout_signature(layout):
+    sides = []
+    for color in (chess.WHITE, chess.BLACK):
+        types = [piece_type for piece_type, piece_color in layout if piece_color == color]
+        sides.append("K" + "".join(letter * types.count(piece_type) for piece_type, letter in SIGNATURE_LETTERS))
+    return "v".join(sides)
+
+
+# Clases a las que se llega con una captura o una coronación
+def subclasses(signature):
+    layout = signature_layout(signature)
+    result = set()
+    for index, (piece_type, color) in enumerate(layout):
+        if piece_type == chess.KING:
+            continue
+        result.add(layout_signature(layout[:index] + layout[index + 1:]))
+        if piece_type == chess.PAWN:
+            for promotion in (chess.QUEEN, chess.ROOK, chess.BISHOP, chess.KNIGHT):
+                result.add(layout_signature(layout[:index] + [(promotion, color)] + layout[index + 1:]))
+    return result
+
+
+def has_pawns_on_both_sides(signature):
+    white, black = signature.upper().split("V")
+    return "P" in white and "P" in black
+
+
+# Todas las clases necesarias para resolver las pedidas, ordenadas de forma que cada una va después de sus subclases
+def build_order(signatures):
+    pending, needed = list(signatures), set()
+    while pending:
+        signature = layout_signature(signature_layout(pending.pop()))
+        if signature in needed:
+            continue
+        if has_pawns_on_both_sides(signature):
+            raise ValueError(f"{signature}: las clases con peones de los dos bandos no están admitidas")
+        needed.add(signature)
+        pending.extend(subclasses(signature))
+    return sorted(needed, key=lambda signature: (len(signature_layout(signature)), signature.upper().count("P"), signature))
+
+
+# Todas las clases con como mucho max_pieces piezas (reyes incluidos)
+def classes_up_to(max_pieces):
+    letters = [letter for _, letter in SIGNATURE_LETTERS]
+    signatures = set()
+    for extra in range(max_pieces - 1):
+        for pieces in itertools.combinations_with_replacement([(letter, color) for letter in letters for color in "wb"], extra):
+            white = "K" + "".join(letter for letter, color in pieces if color == "w")
+            black = "K" + "".join(letter for letter, color in pieces if color == "b")
+            signature = layout_signature(signature_layout(f"{white}v{black}"))
+            if not has_pawns_on_both_sides(signature):
+                signatures.add(signature)
+    return build_order(signatures)
+
+
+# Crea la posición de búsqueda con las piezas de layout en las casillas dadas
+def position_from_squares(layout, squares, turn):
+    position = SearchPosition()
+    position.pawns = position.knights = position.bishops = position.rooks = position.queens = position.kings = 0
+    position.occupied_co = [0, 0]
+    position.material, position.counts = [0, 0], [0] * 14
+    position.piece_key = 0
+    for (piece_type, color), square in zip(layout, squares):
+        position._toggle(piece_type, chess.BB_SQUARES[square])
+        position.occupied_co[color] |= chess.BB_SQUARES[square]
+        position.material[color] += PIECE_VALUES[piece_type]
+        position.counts[color * 7 + piece_type] += 1
+        position.piece_key ^= ZOBRIST_PIECES[piece_type, color][square]
+    position.occupied = position.occupied_co[chess.WHITE] | position.occupied_co[chess.BLACK]
+    position.turn, position.castling_rights, position.ep_square, position.halfmove_clock = turn, 0, None, 0
+    position.key = position.compute_key()
+    position.undo, position.history, position.boundary = [], [position.key], 0
+    return position
+
+
+# Todas las colocaciones con casillas distintas, peones fuera de la primera y la última fila y piezas iguales en orden creciente
+def placements(layout):
+    pawn_squares = range(8, 56)
+    choices = [pawn_squares if piece_type == chess.PAWN else chess.SQUARES for piece_type, _ in layout]
+    for squares in itertools.product(*choices):
+        if len(set(squares)) != len(squares):
+            continue
+        if any(layout[i] == layout[i - 1] and squares[i] < squares[i - 1] for i in range(1, len(layout))):
+            continue
+        yield squares
+
+
+# Casillas vacías desde las que una pieza pudo llegar a square con una jugada que no captura ni corona
+def retreat_squares(piece_type, color, square, occupied):
+    if piece_type == chess.PAWN:
+        step = -8 if color == chess.WHITE else 8
+        origin = square + step
+        if not 8 <= origin < 56 or chess.BB_SQUARES[origin] & occupied:
+            return 0
+        mask = chess.BB_SQUARES[origin]
+        # Avance de dos casillas desde la fila inicial
+        if chess.square_rank(square) == (3 if color == chess.WHITE else 4) and not chess.BB_SQUARES[origin + step] & occupied:
+            mask |= chess.BB_SQUARES[origin + step]
+        return mask
+    if piece_type == chess.KNIGHT:
+        attacks = chess.BB_KNIGHT_ATTACKS[square]
+    elif piece_type == chess.KING:
+        attacks = chess.BB_KING_ATTACKS[square]
+    else:
+        attacks = 0
+        if piece_type in (chess.BISHOP, chess.QUEEN):
+            attacks |= chess.BB_DIAG_ATTACKS[square][chess.BB_DIAG_MASKS[square] & occupied]
+        if piece_type in (chess.ROOK, chess.QUEEN):
+            attacks |= (chess.BB_RANK_ATTACKS[square][chess.BB_RANK_MASKS[square] & occupied] |
+                        chess.BB_FILE_ATTACKS[square][chess.BB_FILE_MASKS[square] & occupied])
+    return attacks & ~occupied
+
+
+# Estado de cada índice de una clase: sin posición válida, con valor fijo (partida terminada o bando sin jugadas seguras)
+# o con jugadas
+INVALID, FIXED, NORMAL = 0, 1, 2
+
+
+# Casillas que gana un jugador que quiere alcanzar "good": sus nodos necesitan una jugada buena y los del rival todas.
+# Devuelve el rango de cada nodo ganado (jugadas hasta llegar), o -1 si no lo gana; las conversiones cuentan como llegada.
+# good es un umbral, así que de las jugadas que salen de la clase basta mirar la mejor y la peor para el jugador
+def attractor(solver, player, good):
+    size = solver.size
+    rank = array("h", [-1]) * size
+    counter = array("h", [0]) * size
+    best, worst = (solver.exit_max, solver.exit_min) if player == chess.WHITE else (solver.exit_min, solver.exit_max)
+    queue, seeds = deque(), []
+    for slot in range(size):
+        state = solver.state[slot]
+        if state == FIXED:
+            if good(decode_tablebase_value(solver.fixed_value[slot])):
+                rank[slot] = 0
+                queue.append(slot)
+        elif state == NORMAL:
+            has_exits = solver.exit_min[slot] != Tablebase.UNKNOWN
+            if solver.turn_of(slot) == player:
+                if has_exits and good(decode_tablebase_value(best[slot])):
+                    seeds.append(slot)
+            elif not has_exits or good(decode_tablebase_value(worst[slot])):
+                counter[slot] = solver.inside[slot]
+                if counter[slot] == 0:
+                    seeds.append(slot)
+            else:
+                counter[slot] = -1
+    for slot in seeds:
+        rank[slot] = 1
+        queue.append(slot)
+    while queue:
+        slot = queue.popleft()
+        next_rank = rank[slot] + 1
+        for pred in solver.predecessors(slot):
+            if rank[pred] >= 0:
+                continue
+            if solver.turn_of(pred) == player:
+                rank[pred] = next_rank
+                queue.append(pred)
+            elif counter[pred] > 0:
+                counter[pred] -= 1
+                if counter[pred] == 0:
+                    rank[pred] = next_rank
+                    queue.append(pred)
+    return rank
+
+
+# Resuelve una clase de material; solved contiene las subclases ya resueltas (firma -> (layout, datos)).
+# Lo que se guarda por posición va en buffers planos indexados como la tabla, de uno o dos bytes por posición; el grafo de
+# jugadas no se guarda: las que llegan a una posición se regeneran hacia atrás cuando hacen falta
+class ClassSolver:
+    def __init__(self, signature, solved):
+        self.signature = signature
+        self.layout = signature_layout(signature)
+        self.solved = solved
+        self.size = 2 * 64 ** len(self.layout)
+        self.turn_stride = 64 ** len(self.layout)
+        self.material = sum(PIECE_VALUES[piece_type] * (1 if color == chess.WHITE else -1) for piece_type, color in self.layout)
+        # Tramos del layout con piezas iguales, que el índice guarda en orden creciente de casilla
+        self.groups, start = [], 0
+        for _, run in itertools.groupby(self.layout):
+            length = len(list(run))
+            if length > 1:
+                self.groups.append((start, start + length))
+            start += length
+        self.state = bytearray(self.size)
+        self.fixed_value = array("b", [Tablebase.UNKNOWN]) * self.size  # Valor codificado de los nodos fijos
+        self.inside = bytearray(self.size)  # Número de jugadas que se quedan en la clase
+        # Peor y mejor valor codificado de las jugadas que salen de la clase (capturas y coronaciones), UNKNOWN si no hay
+        self.exit_min = array("b", [Tablebase.UNKNOWN]) * self.size
+        self.exit_max = array("b", [Tablebase.UNKNOWN]) * self.size
+        self.exit_values = set()
+
+    def turn_of(self, slot):
+        return slot >= self.turn_stride
+
+    # Índice de la posición con las piezas de layout en squares, sin crear la posición
+    def slot_of(self, squares, turn):
+        squares = list(squares)
+        for start, end in self.groups:
+            squares[start:end] = sorted(squares[start:end])
+        index = int(turn)
+        for square in squares:
+            index = index * 64 + square
+        return index
+
+    def squares_of(self, slot):
+        squares = []
+        for _ in self.layout:
+            slot, square = divmod(slot, 64)
+            squares.append(square)
+        return squares[::-1]
+
+    # Valor de una posición de otra clase ya resuelta
+    def exit_value(self, position):
+        layout, data = self.solved[material_signature(position)]
+        value = struct.unpack_from("<b", data, 2 * tablebase_index(position, layout))[0]
+        return decode_tablebase_value(value)
+
+    # Recorre todas las posiciones una vez y anota su estado, sus jugadas dentro de la clase y las que salen de ella
+    def expand(self):
+        for squares in placements(self.layout):
+            for turn in (chess.WHITE, chess.BLACK):
+                position = position_from_squares(self.layout, squares, turn)
+                # El bando que no mueve no puede estar en jaque
+                their_king = chess.msb(position.kings & position.occupied_co[not turn])
+                if position.attackers_mask(turn, their_king):
+                    continue
+                slot = tablebase_index(position, self.layout)
+                if position.is_game_over():
+                    self.state[slot], self.fixed_value[slot] = FIXED, encode_tablebase_value(self.material)
+                    continue
+                moves = generate_safe_moves(position)
+                if not moves:
+                    self.state[slot] = FIXED
+                    self.fixed_value[slot] = Tablebase.MINUS_INF if turn == chess.WHITE else Tablebase.PLUS_INF
+                    continue
+                inside, exits = 0, []
+                for move in moves:
+                    if move.promotion or chess.BB_SQUARES[move.to_square] & position.occupied:
+                        position.push(move)
+                        exits.append(self.exit_value(position))
+                        position.pop()
+                    else:
+                        inside += 1
+                self.state[slot], self.inside[slot] = NORMAL, inside
+                if exits:
+                    self.exit_min[slot], self.exit_max[slot] = encode_tablebase_value(min(exits)), encode_tablebase_value(max(exits))
+                    self.exit_values.update(exits)
+
+    # Posiciones de la clase desde las que una jugada segura lleva a slot: el bando que acaba de mover lleva una de sus
+    # piezas hacia atrás a una casilla vacía (sin capturas ni coronaciones, que vienen de otra clase) y la jugada se
+    # comprueba hacia delante, porque que sea segura depende de la posición de partida
+    def predecessors(self, slot):
+        turn = self.turn_of(slot)
+        mover = not turn
+        squares = self.squares_of(slot % self.turn_stride)
+        occupied = 0
+        for square in squares:
+            occupied |= chess.BB_SQUARES[square]
+        for index, (piece_type, color) in enumerate(self.layout):
+            if color != mover:
+                continue
+            square = squares[index]
+            for origin in chess.scan_forward(retreat_squares(piece_type, color, square, occupied)):
+                previous = squares[:index] + [origin] + squares[index + 1:]
+                pred = self.slot_of(previous, mover)
+                if self.state[pred] != NORMAL:
+                    continue
+                if chess.Move(origin, square) in generate_safe_moves(position_from_squares(self.layout, previous, mover)):
+                    yield pred
+
+    # Valor exacto por umbrales: para cada umbral t se calcula quién puede forzar un resultado >= t.
+    # Si el material actual ya es >= t, a las blancas les basta con evitar los resultados malos (atractor de las negras);
+    # si no, tienen que forzar uno bueno (atractor de las blancas). El valor es el mayor umbral que consiguen las blancas
+    def solve(self):
+        self.expand()
+        candidates = {self.material, float('inf')} | self.exit_values
+        candidates.update(decode_tablebase_value(self.fixed_value[slot]) for slot in range(self.size) if self.state[slot] == FIXED)
+        thresholds = sorted(candidate for candidate in candidates if candidate != float('-inf'))
+        value = array("b", [Tablebase.MINUS_INF]) * self.size
+        distance = bytearray([Tablebase.NO_DISTANCE]) * self.size
+        previous = Tablebase.MINUS_INF
+        for threshold in thresholds:
+            encoded = encode_tablebase_value(threshold)
+            if threshold > self.material:
+                rank = attractor(self, chess.WHITE, lambda result: result >= threshold)
+                for slot in range(self.size):
+                    if self.state[slot] and rank[slot] >= 0:
+                        value[slot], distance[slot] = encoded, min(rank[slot], Tablebase.NO_DISTANCE)
+            else:
+                rank = attractor(self, chess.BLACK, lambda result: result < threshold)
+                for slot in range(self.size):
+                    if not self.state[slot]:
+                        continue
+                    if rank[slot] < 0:
+                        value[slot] = encoded
+                    elif value[slot] == previous:
+                        distance[slot] = min(rank[slot], Tablebase.NO_DISTANCE)
+            previous = encoded
+        data = bytearray(2 * self.size)
+        for slot in range(self.size):
+            if self.state[slot] == INVALID:
+                value[slot], distance[slot] = Tablebase.UNKNOWN, Tablebase.NO_DISTANCE
+            elif self.state[slot] == FIXED:
+                distance[slot] = 0
+        data[0::2], data[1::2] = value.tobytes(), distance
+        return data
+
+
+# Escribe el archivo: cabecera JSON con la posición y el orden de cada clase y después los bloques de dos bytes por posición
+def write_tablebase(path, tables):
+    header, offset = {"classes": {}}, 0
+    for signature, (layout, data) in tables.items():
+        header["classes"][signature] = {"offset": offset, "layout": [list(piece) for piece in layout]}
+        offset += len(data)
+    encoded = json.dumps(header).encode("utf-8")
+    temp = f"{path}.{os.getpid()}.tmp"
+    with open(temp, "wb") as file:
+        file.write(Tablebase.MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        for _, data in tables.values():
+            file.write(data)
+    os.replace(temp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera la tabla de finales del motor por análisis retrógrado")
+    parser.add_argument("--max-pieces", type=int, default=3, help="genera todas las clases con hasta este número de piezas, reyes incluidos")
+    parser.add_argument("--class", dest="classes", action="append", default=[], help="clase adicional, por ejemplo KRvKN (se puede repetir)")
+    parser.add_argument("--output", default=TABLEBASE_PATH, help="archivo de la tabla")
+    parser.add_argument("--rebuild", action="store_true", help="vuelve a calcular también las clases que ya están en el archivo")
+    args = parser.parse_args()
+
+    order = build_order(set(classes_up_to(args.max_pieces)) | set(args.classes))
+    tables = {}
+    # Las clases ya generadas se reutilizan, así que se pueden añadir clases grandes poco a poco
+    existing = None if args.rebuild else Tablebase.open(args.output)
+    if existing is not None:
+        for signature, (offset, layout) in existing.classes.items():
+            tables[signature] = (layout, bytes(existing.data[offset:offset + 2 * 2 * 64 ** len(layout)]))
+        existing.close()
+    for signature in order:
+        if signature in tables:
+            continue
+        start = time.perf_counter()
+        data = ClassSolver(signature, tables).solve()
+        tables[signature] = (signature_layout(signature), data)
+        print(f"{signature:<8} {time.perf_counter() - start:8.1f} s", file=sys.stderr)
+    write_tablebase(args.output, tables)
+    print(f"{len(tables)} clases en {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
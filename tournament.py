@@ -0,0 +1,259 @@
+import argparse
+import io
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+import chess
+import chess.pgn
+from motor import (AI_MAX_DEPTH, AI_MAX_NODES, AI_TIME_BUDGET_MS, BOOK_PATH, Determine_winner, SearchEngine,
+                   generate_safe_moves, is_all_pieces_captured, push_counted, setup_custom_board)
+
+# Torneo de autojuego sin interfaz: los motores configurados se enfrentan todos contra todos en un grupo de procesos.
+# Cada partida termina como en la ventana (board.is_game_over() o sin piezas además de los reyes) y se guarda en cuanto
+# acaba, en una línea del archivo JSONL, con las jugadas, los contadores move_counter y turn_counter de la partida y el
+# resultado de Determine_winner. El archivo solo crece: si el torneo se interrumpe, al volver a lanzarlo con el mismo
+# archivo se juegan solo las partidas que faltan. Opcionalmente se añade cada partida a un archivo PGN.
+# Cada pareja de partidas empieza con las mismas jugadas al azar y con los colores cambiados.
+
+# Archivo de partidas por defecto
+DEFAULT_OUTPUT = "torneo.jsonl"
+# Límite de jugadas (plies) por partida, por si ninguna regla la termina antes
+MAX_PLIES = 600
+# Cuantil de la normal para los intervalos de confianza del 95 %
+Z_95 = 1.96
+# Valores por defecto y tipo de cada campo de la configuración de un motor
+ENGINE_FIELDS = {"depth": AI_MAX_DEPTH, "time": AI_TIME_BUDGET_MS, "nodes": AI_MAX_NODES, "eval": "material", "book": 1}
+# Resultado PGN de cada respuesta de Determine_winner (None: la partida terminó con más de dos piezas)
+PGN_RESULTS = {"Blancas": "1-0", "Negras": "0-1", "Empate": "1/2-1/2", None: "*"}
+
+
+# Configuración de un motor a partir de "nombre:depth=4,time=500,eval=pst,book=0"; los campos omitidos toman su valor por defecto
+def parse_engine(spec):
+    name, _, fields = spec.partition(":")
+    config = dict(ENGINE_FIELDS, name=name)
+    for field in filter(None, fields.split(",")):
+        key, _, value = field.partition("=")
+        if key not in ENGINE_FIELDS:
+            raise argparse.ArgumentTypeError(f"campo desconocido {key!r} en {spec!r} (válidos: {', '.join(ENGINE_FIELDS)})")
+        config[key] = value if key == "eval" else int(value)
+    if config["eval"] not in ("material", "pst"):
+        raise argparse.ArgumentTypeError(f"evaluación desconocida {config['eval']!r} (material o pst)")
+    return config
+
+
+# Motor de una configuración. La evaluación pst usa evaluation.BatchEvaluator, que necesita NumPy; solo se importa si se pide
+def make_engine(config):
+    evaluator = None
+    if config["eval"] == "pst":
+        from evaluation import BatchEvaluator
+        evaluator = BatchEvaluator()
+    return SearchEngine(book_path=BOOK_PATH if config["book"] else None, evaluator=evaluator)
+
+
+# Jugadas al azar con las que empieza cada pareja de partidas; dependen solo de la semilla y del número de pareja
+def random_opening(seed, pair, plies):
+    rng, board, moves = random.Random(f"{seed}:{pair}"), setup_custom_board(), []
+    for _ in range(plies):
+        legal_moves = list(generate_safe_moves(board))
+        if not legal_moves or board.is_game_over():
+            break
+        move = rng.choice(legal_moves)
+        board.push(move)
+        moves.append(move.uci())
+    return moves
+
+
+# Lista de partidas del torneo: cada pareja de motores juega games partidas, alternando colores
+def schedule(configs, games, seed, opening_plies):
+    tasks, pair = [], 0
+    for first, second in itertools.combinations([config["name"] for config in configs], 2):
+        for game in range(games):
+            if game % 2 == 0:
+                opening = random_opening(seed, pair, opening_plies)
+                pair += 1
+            white, black = (first, second) if game % 2 == 0 else (second, first)
+            tasks.append({"index": len(tasks), "white": white, "black": black, "opening": opening})
+    return tasks
+
+
+# Estado de cada proceso del torneo: un motor por configuración, que se reutiliza entre partidas
+_worker_state = {}
+
+def _init_worker(configs, max_plies):
+    # Ctrl+C lo atiende el proceso principal, que guarda lo jugado y termina el grupo
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_state.update(configs={config["name"]: config for config in configs}, max_plies=max_plies,
+                         engines={config["name"]: make_engine(config) for config in configs})
+
+
+# Juega una partida completa y devuelve su registro
+def _play_game(task):
+    configs, engines = _worker_state["configs"], _worker_state["engines"]
+    board, move_counter, turn_counter = setup_custom_board(), {}, {}
+    start = time.perf_counter()
+    for uci in task["opening"]:
+        push_counted(board, chess.Move.from_uci(uci), move_counter, turn_counter)
+    for name in (task["white"], task["black"]):
+        engines[name].transposition_table.clear()
+    termination = "fin"
+    while not (board.is_game_over() or is_all_pieces_captured(board)):
+        if len(board.move_stack) >= _worker_state["max_plies"]:
+            termination = "límite de jugadas"
+            break
+        name = task["white"] if board.turn == chess.WHITE else task["black"]
+        config = configs[name]
+        move = engines[name].get_best_move(board, board.turn, time_budget_ms=config["time"], max_nodes=config["nodes"], max_depth=config["depth"])
+        # El motor solo juega jugadas seguras: si no le queda ninguna, la partida acaba aunque haya jugadas legales
+        if move is None:
+            termination = "sin jugadas seguras"
+            break
+        push_counted(board, move, move_counter, turn_counter)
+    winner = Determine_winner(board, move_counter)
+    return dict(task, moves=[move.uci() for move in board.move_stack], plies=len(board.move_stack), termination=termination,
+                move_counter=move_counter, turn_counter=turn_counter, winner=winner, result=PGN_RESULTS[winner],
+                seconds=round(time.perf_counter() - start, 3))
+
+
+# Partida en PGN a partir de su registro
+def game_pgn(record, event):
+    board = setup_custom_board()
+    for uci in record["moves"]:
+        board.push(chess.Move.from_uci(uci))
+    game = chess.pgn.Game.from_board(board)
+    game.headers.update(Event=event, Round=str(record["index"] + 1), White=record["white"], Black=record["black"], Result=record["result"])
+    # Etiquetas propias con el resultado de Determine_winner y los contadores, como pares nombre=valor
+    game.headers["Termination"] = record["termination"]
+    game.headers["Winner"] = record["winner"] or "-"
+    game.headers["MoveCounter"] = " ".join(f"{name}={count}" for name, count in sorted(record["move_counter"].items()))
+    game.headers["TurnCounter"] = " ".join(f"{name}={count}" for name, count in sorted(record["turn_counter"].items()))
+    output = io.StringIO()
+    print(game, file=output, end="\n\n")
+    return output.getvalue()
+
+
+# Lee el archivo de un torneo anterior: comprueba que la cabecera coincide y devuelve las partidas ya jugadas.
+# Una última línea a medio escribir (el proceso se cortó mientras guardaba) se descarta
+def load_records(path, header):
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        data = file.read()
+    complete = data[:data.rfind(b"\n") + 1]
+    if len(complete) != len(data):
+        with open(path, "r+b") as file:
+            file.truncate(len(complete))
+    lines = complete.decode("utf-8").splitlines()
+    if not lines:
+        return None
+    previous = json.loads(lines[0])
+    if previous != header:
+        raise SystemExit(f"{path} es de otro torneo (otros motores u opciones); usa otro archivo con --output")
+    return [json.loads(line) for line in lines[1:]]
+
+
+# Puntos, victorias, tablas y derrotas de cada motor. Las partidas sin ganador (Determine_winner devuelve Empate o None) cuentan como tablas
+def standings(configs, records):
+    table = {config["name"]: [] for config in configs}
+    for record in records:
+        white_score = {"Blancas": 1.0, "Negras": 0.0}.get(record["winner"], 0.5)
+        table[record["white"]].append(white_score)
+        table[record["black"]].append(1.0 - white_score)
+    return table
+
+
+# Puntuación media con intervalo de confianza del 95 % (aproximación normal) y la diferencia de Elo que le corresponde
+def score_interval(scores):
+    n = len(scores)
+    mean = sum(scores) / n
+    deviation = math.sqrt(sum((score - mean) ** 2 for score in scores) / (n - 1)) if n > 1 else 0.0
+    margin = Z_95 * deviation / math.sqrt(n)
+    return mean, margin
+
+
+def elo_difference(score):
+    if score <= 0 or score >= 1:
+        return None
+    return -400 * math.log10(1 / score - 1) + 0.0  # + 0.0 evita que el 50 % se muestre como -0
+
+
+def print_standings(configs, records, file=sys.stdout):
+    print(f"{'motor':<12} {'partidas':>8} {'+':>5} {'=':>5} {'-':>5} {'puntos':>7} {'%':>14} {'Elo':>16}", file=file)
+    for name, scores in standings(configs, records).items():
+        if not scores:
+            print(f"{name:<12} {0:>8}", file=file)
+            continue
+        mean, margin = score_interval(scores)
+        elo, low, high = (elo_difference(score) for score in (mean, mean - margin, mean + margin))
+        elo_text = "" if elo is None else f"{elo:+.0f}" + ("" if low is None or high is None else f" [{low:+.0f}, {high:+.0f}]")
+        print(f"{name:<12} {len(scores):>8} {scores.count(1.0):>5} {scores.count(0.5):>5} {scores.count(0.0):>5} "
+              f"{sum(scores):>7.1f} {100 * mean:>6.1f} ± {100 * margin:>4.1f} {elo_text:>16}", file=file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Torneo de autojuego entre configuraciones del motor, sin interfaz")
+    parser.add_argument("--engine", dest="engines", action="append", type=parse_engine, default=[],
+                        help="motor como nombre:depth=N,time=MS,nodes=N,eval=material|pst,book=0|1 (al menos dos)")
+    parser.add_argument("--games", type=int, default=10, help="partidas de cada pareja de motores")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="procesos que juegan partidas a la vez")
+    parser.add_argument("--opening-plies", type=int, default=4, help="jugadas al azar al principio de cada pareja de partidas")
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES, help="límite de jugadas por partida")
+    parser.add_argument("--seed", type=int, default=1, help="semilla de las aperturas al azar")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="archivo JSONL de partidas; si ya existe, el torneo se reanuda")
+    parser.add_argument("--pgn", help="archivo PGN donde añadir también cada partida")
+    args = parser.parse_args()
+    if len(args.engines) < 2 or len({config["name"] for config in args.engines}) != len(args.engines):
+        parser.error("hacen falta al menos dos --engine con nombres distintos")
+
+    header = {"type": "torneo", "engines": args.engines, "games": args.games, "opening_plies": args.opening_plies,
+              "max_plies": args.max_plies, "seed": args.seed}
+    records = load_records(args.output, header)
+    if records is None:
+        records = []
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(json.dumps(header, ensure_ascii=False) + "\n")
+    done = {record["index"] for record in records}
+    tasks = [task for task in schedule(args.engines, args.games, args.seed, args.opening_plies) if task["index"] not in done]
+    total = len(done) + len(tasks)
+    if done:
+        print(f"Reanudando {args.output}: {len(done)} partidas ya jugadas, faltan {len(tasks)}", file=sys.stderr)
+
+    start, played = time.perf_counter(), 0
+    event = " vs ".join(config["name"] for config in args.engines)
+    workers = max(1, min(args.workers, len(tasks)))
+    pool = multiprocessing.Pool(workers, initializer=_init_worker, initargs=(args.engines, args.max_plies))
+    try:
+        with open(args.output, "a", encoding="utf-8") as output:
+            for record in pool.imap_unordered(_play_game, tasks):
+                # Cada partida se escribe y se vuelca al disco en cuanto termina, así que una interrupción solo pierde las que están en juego
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+                os.fsync(output.fileno())
+                if args.pgn:
+                    with open(args.pgn, "a", encoding="utf-8") as pgn:
+                        pgn.write(game_pgn(record, event))
+                records.append(record)
+                played += 1
+                minutes = (time.perf_counter() - start) / 60
+                print(f"[{len(records)}/{total}] {record['white']} - {record['black']}  {record['result']:<7} "
+                      f"{record['plies']} jugadas, {record['seconds']:.1f} s  ({played / minutes:.1f} partidas/min)", file=sys.stderr)
+        pool.close()
+    except KeyboardInterrupt:
+        print(f"\nInterrumpido: {len(records)}/{total} partidas guardadas en {args.output}; vuelve a lanzar el mismo comando para seguir", file=sys.stderr)
+    finally:
+        pool.terminate()
+        pool.join()
+
+    minutes = (time.perf_counter() - start) / 60
+    print_standings(args.engines, records)
+    if played:
+        print(f"{played} partidas en {minutes:.1f} min: {played / minutes:.1f} partidas/min con {workers} procesos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import sys
+import threading
+import chess
+from motor import AI_MAX_DEPTH, AI_MAX_NODES, AI_TIME_BUDGET_MS, TT_SIZE_MB, CustomBoard, SearchEngine, setup_custom_board
+
+# Protocolo de texto al estilo UCI para manejar el motor como subproceso, sin interfaz gráfica.
+# Órdenes admitidas:
+#   uci, isready, ucinewgame, quit
+#   setoption name Hash value <MB> | setoption name Threads value <procesos>
+#   position startpos [moves <jugadas>]   (startpos es la posición inicial personalizada del juego)
+#   position fen <fen> [moves <jugadas>]
+#   go [movetime <ms>] [wtime <ms>] [btime <ms>] [winc <ms>] [binc <ms>] [movestogo <n>] [depth <n>] [nodes <n>]
+#      [infinite] [ponder] [searchmoves <jugadas>]   (las demás palabras, como mate <n>, se ignoran)
+#   stop, ponderhit   (con go infinite o go ponder, bestmove se guarda hasta recibir una de estas órdenes)
+#   d   (muestra el tablero y su FEN)
+ENGINE_NAME = "Lose Chess"
+# Parámetros numéricos de go y todas las palabras que reconoce (searchmoves toma jugadas hasta la siguiente de ellas)
+GO_NUMERIC = ("wtime", "btime", "winc", "binc", "movestogo", "movetime", "depth", "nodes")
+GO_KEYWORDS = GO_NUMERIC + ("infinite", "ponder", "searchmoves", "mate")
+# Jugadas entre las que se reparte el reloj si go no indica movestogo
+MOVES_TO_GO = 30
+
+
+class UciFrontend:
+    def __init__(self, output=sys.stdout):
+        self.output = output
+        self.hash_mb, self.threads = TT_SIZE_MB, 1
+        self.engine = SearchEngine(self.hash_mb, self.threads)
+        self.board = setup_custom_board()
+        self.search_thread = None
+        # Con go infinite o go ponder la búsqueda espera a este evento para publicar su bestmove
+        self.release = threading.Event()
+
+    # Escribe una línea de respuesta y vacía la salida para que el proceso que nos maneja la lea enseguida
+    def send(self, line):
+        self.output.write(line + "\n")
+        self.output.flush()
+
+    # Procesa una orden; devuelve False cuando hay que terminar
+    def handle(self, line):
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send(f"option name Hash type spin default {TT_SIZE_MB} min 1 max 1024")
+            self.send("option name Threads type spin default 1 min 1 max 64")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.wait_search()
+            self.engine.transposition_table.clear()
+            self.board = setup_custom_board()
+        elif command == "setoption":
+            self.set_option(args)
+        elif command == "position":
+            self.wait_search()
+            self.set_position(args)
+        elif command == "go":
+            self.wait_search()
+            self.go(args)
+        elif command == "stop":
+            self.wait_search()
+        elif command == "ponderhit":
+            # El rival jugó la jugada esperada: la búsqueda sigue con sus límites y publica su bestmove al terminar
+            self.release.set()
+        elif command == "d":
+            self.send(str(self.board))
+            self.send(f"Fen: {self.board.fen()}")
+        elif command == "quit":
+            self.wait_search()
+            self.engine.close()
+            return False
+        else:
+            self.send(f"info string orden desconocida: {command}")
+        return True
+
+    # Cambia el tamaño de la tabla de transposición o el número de procesos; el motor se vuelve a crear
+    def set_option(self, args):
+        if len(args) < 4 or args[0] != "name" or args[2] != "value":
+            return
+        try:
+            name, value = args[1].lower(), int(args[3])
+        except ValueError:
+            return
+        if name == "hash":
+            self.hash_mb = value
+        elif name == "threads":
+            self.threads = value
+        else:
+            return
+        self.wait_search()
+        self.engine.close()
+        self.engine = SearchEngine(self.hash_mb, self.threads)
+
+    def set_position(self, args):
+        if args and args[0] == "startpos":
+            board, rest = setup_custom_board(), args[1:]
+        elif args and args[0] == "fen":
+            end = args.index("moves") if "moves" in args else len(args)
+            try:
+                board = CustomBoard(" ".join(args[1:end]))
+            except ValueError:
+                self.send(f"info string FEN no válida: {' '.join(args[1:end])}")
+                return
+            rest = args[end:]
+        else:
+            return
+        # Las jugadas se aplican hasta la primera ilegal, que se descarta junto con las siguientes
+        if rest and rest[0] == "moves":
+            for uci in rest[1:]:
+                try:
+                    move = chess.Move.from_uci(uci)
+                except ValueError:
+                    move = None
+                if move is None or not board.is_legal(move):
+                    self.send(f"info string jugada ilegal: {uci}")
+                    break
+                board.push(move)
+        self.board = board
+
+    # Lanza la búsqueda en un hilo para seguir leyendo órdenes (por ejemplo, stop) mientras piensa
+    def go(self, args):
+        options = {}
+        infinite = ponder = False
+        search_moves = None
+        i = 0
+        while i < len(args):
+            token = args[i]
+            i += 1
+            if token == "infinite":
+                infinite = True
+            elif token == "ponder":
+                ponder = True
+            elif token == "searchmoves":
+                search_moves = []
+                while i < len(args) and args[i] not in GO_KEYWORDS:
+                    try:
+                        search_moves.append(chess.Move.from_uci(args[i]))
+                    except ValueError:
+                        pass
+                    i += 1
+            elif token in GO_NUMERIC and i < len(args):
+                # Un valor que no es un número se ignora junto con su parámetro
+                try:
+                    options[token] = int(args[i])
+                    i += 1
+                except ValueError:
+                    pass
+        if infinite:
+            time_budget_ms = float('inf')
+        elif "movetime" in options:
+            time_budget_ms = options["movetime"]
+        elif "wtime" in options or "btime" in options:
+            # Reparte el reloj restante entre las jugadas que quedan hasta el siguiente control, más el incremento
+            side = "w" if self.board.turn == chess.WHITE else "b"
+            time_budget_ms = options.get(f"{side}time", 0) / max(1, options.get("movestogo", MOVES_TO_GO)) + options.get(f"{side}inc", 0)
+        elif "depth" in options or "nodes" in options:
+            time_budget_ms = float('inf')
+        else:
+            time_budget_ms = AI_TIME_BUDGET_MS
+        limits = {
+            "time_budget_ms": time_budget_ms,
+            "max_nodes": options.get("nodes", AI_MAX_NODES if time_budget_ms != float('inf') else float('inf')),
+            "max_depth": options.get("depth", AI_MAX_DEPTH),
+            "search_moves": search_moves,
+        }
+        self.engine.stop_event.clear()
+        if infinite or ponder:
+            self.release.clear()
+        else:
+            self.release.set()
+        self.search_thread = threading.Thread(target=self.search, args=(self.board.copy(), limits), daemon=True)
+        self.search_thread.start()
+
+    def search(self, board, limits):
+        def progress(depth, move, nodes):
+            self.send(f"info depth {depth} nodes {nodes} pv {move.uci()}")
+        move = self.engine.get_best_move(board, board.turn, progress=progress, **limits)
+        self.release.wait()
+        self.send(f"bestmove {move.uci() if move else '0000'}")
+
+    # Detiene la búsqueda en curso, si la hay, y espera a que publique su bestmove
+    def wait_search(self):
+        if self.search_thread is not None:
+            self.engine.stop_event.set()
+            self.release.set()
+            self.search_thread.join()
+            self.search_thread = None
+
+
+def main():
+    frontend = UciFrontend()
+    for line in sys.stdin:
+        if not frontend.handle(line.strip()):
+            break
+
+
+if __name__ == "__main__":
+    main()